@@ -0,0 +1,203 @@
+"""Micro-benchmarks dos kernels de pontuação e decifração.
+
+As fixtures são geradas pelas próprias funções de cifragem do GeraEP1
+(enc_monosyllabic, enc_hill, enc_vigenere), com semente fixa, sobre um texto
+em português sorteado do vocabulário do modelo, em vários tamanhos (de 120
+letras a ~1 MB). Para cada kernel e tamanho mede-se operações por segundo e
+o pico de memória alocada por chamada (tracemalloc).
+
+Uso:
+    python benchmark.py                           # mede e imprime
+    python benchmark.py --salvar baseline.json    # grava a linha de base
+    python benchmark.py --comparar baseline.json  # aponta regressões (sai com 1)
+
+Cada medida é a mediana de várias janelas; uma queda além da tolerância só
+reprova a execução se persistir ao ser remedida em processos novos.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+TAMANHOS = (120, 1_200, 12_000, 120_000, 1_200_000)
+SEMENTE = 2024
+
+# Tempo mínimo de cada janela de medição e quantas janelas por kernel e tamanho:
+# vale a mediana, que nem um pico nem uma queda isolados da máquina deslocam
+TEMPO_MINIMO = 0.2
+REPETICOES = 5
+# Queda de ops/s (fração) a partir da qual uma medida conta como regressão
+TOLERANCIA = 0.2
+# Quantas vezes uma regressão é remedida antes de reprovar a execução
+CONFIRMACOES = 2
+
+def carregar_script(caminho, nome):
+    """Importa um script do projeto pelo caminho (vários se chamam main.py)."""
+    caminho = os.path.join(RAIZ, caminho)
+    if os.path.dirname(caminho) not in sys.path:
+        sys.path.insert(0, os.path.dirname(caminho))
+    spec = importlib.util.spec_from_file_location(nome, caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(modulo)
+    return modulo
+
+def texto_base(tamanho, modelo, semente=SEMENTE):
+    """Texto a-z de pelo menos ``tamanho`` letras: palavras do vocabulário sorteadas."""
+    vocab = sorted(modelo.palavras)
+    rng = random.Random(semente)
+    partes, total = [], 0
+    while total < tamanho:
+        palavra = rng.choice(vocab)
+        partes.append(palavra)
+        total += len(palavra)
+    return ''.join(partes)
+
+def gerar_fixtures(tamanhos, gera, modelo, semente=SEMENTE):
+    """Desafios Mono, Hill 3x3 e Vigenère (K=20) de cada tamanho, cifrados pelo GeraEP1."""
+    fixtures = {}
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            for pasta in ('Cifrado', 'Aberto'):
+                for cifra in ('Mono', 'Hill', 'Vigenere'):
+                    os.makedirs(os.path.join(pasta, cifra))
+            for tamanho in tamanhos:
+                # O GeraEP1 sorteia com random e np.random globais
+                random.seed(semente + tamanho)
+                np.random.seed(semente + tamanho)
+                conteudo = texto_base(tamanho, modelo, semente + tamanho)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    gera.enc_monosyllabic(conteudo, tamanho, 'Bench')
+                    gera.enc_hill(conteudo, tamanho, 'Bench', 3)
+                    gera.enc_vigenere(conteudo, tamanho, 'Bench', 20)
+                ler = lambda caminho: open(caminho).read()
+                fixtures[tamanho] = {
+                    'mono': (ler('Cifrado/Mono/Bench_texto_cifrado.txt'), ler('Aberto/Mono/Bench_key.txt')),
+                    'hill': (ler('Cifrado/Hill/Bench_3_texto_cifrado.txt'), ler('Aberto/Hill/Bench_3_texto_aberto.txt')),
+                    'vigenere': (ler('Cifrado/Vigenere/Bench_20_texto_cifrado.txt'), ler('Aberto/Vigenere/Bench_20_texto_aberto.txt'),
+                                 ler('Aberto/Vigenere/Bench_20_key.txt')[:20]),
+                }
+        finally:
+            os.chdir(diretorio_original)
+    return fixtures
+
+def kernels(fixture, hill, mono, vigenere):
+    """Nome -> chamada sem argumentos de cada kernel sobre a fixture."""
+    cifra_mono, chave_mono = fixture['mono']
+    cifra_hill, aberto_hill = fixture['hill']
+    cifra_vig, aberto_vig, chave_vig = fixture['vigenere']
+    blocos = hill.gerar_blocos(hill.text_to_numbers(cifra_hill))
+    inversa = np.array([[7, 19, 14], [0, 25, 21], [0, 0, 9]])
+    # aplicar_chave usa a tabela cifrada -> clara; a chave do GeraEP1 é clara -> cifrada
+    chave_dec = ''.join(mono.ALFABETO[chave_mono.index(c)] for c in mono.ALFABETO)
+    return {
+        'chi_squared_score': lambda: hill.chi_squared_score(aberto_hill),
+        'count_known_words': lambda: hill.count_known_words(aberto_hill),
+        'word_coverage_ratio': lambda: hill.word_coverage_ratio(aberto_hill),
+        'decrypt_blocks': lambda: hill.decrypt_blocks(blocos, inversa),
+        'score_total': lambda: mono.score_total(cifra_mono),
+        'aplicar_chave': lambda: mono.aplicar_chave(cifra_mono, chave_dec),
+        'pontuacao_texto': lambda: vigenere.pontuacao_texto(aberto_vig),
+        'decifrar_vigenere': lambda: vigenere.decifrar_vigenere(cifra_vig, chave_vig),
+    }
+
+def medir(funcao, tempo_minimo=TEMPO_MINIMO, repeticoes=REPETICOES):
+    """(ops/s mediano de ``repeticoes`` janelas, pico de memória em bytes de uma chamada)."""
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    taxas = []
+    for _ in range(repeticoes):
+        execucoes, inicio = 0, time.perf_counter()
+        while True:
+            funcao()
+            execucoes += 1
+            decorrido = time.perf_counter() - inicio
+            if decorrido >= tempo_minimo:
+                taxas.append(execucoes / decorrido)
+                break
+    return float(np.median(taxas)), pico
+
+def executar(tamanhos=TAMANHOS, filtro=None, repeticoes=REPETICOES):
+    sys.path.insert(0, os.path.join(RAIZ, 'textos_desconhecidos_solucao'))
+    from modelo_linguagem import carregar_modelo
+    modelo = carregar_modelo()
+    gera = carregar_script('data/textos_desconhecidos/GeraEP1.py', 'gera_ep1')
+    hill = carregar_script('textos_desconhecidos_solucao/hill/hill3x3.py', 'bench_hill3x3')
+    mono = carregar_script('textos_desconhecidos_solucao/mono/main.py', 'bench_mono')
+    vigenere = carregar_script('textos_desconhecidos_solucao/vigenere/vigenere_final.py', 'bench_vigenere')
+
+    resultados = {}
+    for tamanho, fixture in gerar_fixtures(tamanhos, gera, modelo).items():
+        for nome, funcao in kernels(fixture, hill, mono, vigenere).items():
+            if filtro and filtro not in nome:
+                continue
+            ops, pico = medir(funcao, repeticoes=repeticoes)
+            resultados[f"{nome}/{tamanho}"] = {'ops_por_segundo': ops, 'pico_memoria': pico}
+            print(f"{nome:>20} {tamanho:>9}  {ops:12.1f} ops/s  {pico / 1024:10.1f} KiB")
+    return resultados
+
+def comparar(resultados, baseline, tolerancia=TOLERANCIA):
+    """Lista de regressões de ops/s em relação à linha de base (chaves "kernel/tamanho")."""
+    regressoes = []
+    for chave, atual in resultados.items():
+        if chave not in baseline:
+            continue
+        razao = atual['ops_por_segundo'] / baseline[chave]['ops_por_segundo']
+        marca = ''
+        if razao < 1 - tolerancia:
+            regressoes.append(chave)
+            marca = '  <-- regressão'
+        print(f"{chave:>30}  {razao:6.2f}x{marca}")
+    return regressoes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS))
+    parser.add_argument('--kernel', help="mede só os kernels cujo nome contém este texto")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES, help="janelas de medição (vale a mediana)")
+    parser.add_argument('--salvar', help="grava os resultados como linha de base (JSON)")
+    parser.add_argument('--comparar', help="linha de base (JSON) para detectar regressões")
+    args = parser.parse_args()
+
+    resultados = executar(args.tamanhos, args.kernel, args.repeticoes)
+    if args.salvar:
+        with open(args.salvar, 'w') as f:
+            json.dump(resultados, f, indent=2, sort_keys=True)
+    if args.comparar:
+        with open(args.comparar) as f:
+            baseline = json.load(f)
+        regressoes = comparar(resultados, baseline)
+        # Uma queda isolada pode ser ruído (inclusive do processo: layout de
+        # memória, alinhamento): remede só os kernels apontados, cada vez em
+        # um interpretador novo, e fica com a melhor medida antes de reprovar
+        for _ in range(CONFIRMACOES):
+            if not regressoes:
+                break
+            print(f"Remedindo {len(regressoes)} kernels")
+            with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn')) as executor:
+                for chave in regressoes:
+                    nome, tamanho = chave.rsplit('/', 1)
+                    nova = executor.submit(executar, [int(tamanho)], nome, args.repeticoes).result()[chave]
+                    if nova['ops_por_segundo'] > resultados[chave]['ops_por_segundo']:
+                        resultados[chave] = nova
+            regressoes = comparar({chave: resultados[chave] for chave in regressoes}, baseline)
+        if regressoes:
+            print(f"{len(regressoes)} regressões")
+            sys.exit(1)
@@ -1,10 +1,10 @@
 import re
 import os
+import argparse
 from unidecode import unidecode
 import numpy as np
 import string
 import random
-import math
 
 
 def sortear_arquivo_txt(diretorio):
@@ -85,6 +85,73 @@ def inv_multiplicativo(b, m):
         B = T
 
 
+# Chaves de Hill invertíveis mod 26 sorteadas diretamente, em aritmética
+# inteira exata. Pelo teorema chinês do resto, uma matriz é invertível mod 26
+# se e só se é invertível mod 2 e mod 13; sorteando as duas partes de modo
+# uniforme e independente, a chave é uniforme entre as invertíveis mod 26.
+
+
+def inversas_mod_primo(matrizes, p):
+    # Gauss-Jordan em lote sobre [M | I] mod p: devolve (inversas, invertivel).
+    # Com p <= 13 as contas cabem em int16.
+    quantidade, k, _ = matrizes.shape
+    identidade = np.broadcast_to(np.eye(k, dtype=np.int16), (quantidade, k, k))
+    A = np.concatenate([(matrizes % p).astype(np.int16), identidade], axis=2)
+    inversos = np.array([0] + [pow(x, -1, p) for x in range(1, p)])
+    invertivel = np.ones(quantidade, dtype=bool)
+    todas = np.arange(quantidade)
+    for col in range(k):
+        # Pivô: primeira linha, a partir de col, com entrada não nula na coluna
+        nao_nulo = A[:, col:, col] != 0
+        invertivel &= nao_nulo.any(axis=1)
+        piv = col + np.argmax(nao_nulo, axis=1)
+        linha_piv = A[todas, piv].copy()
+        A[todas, piv] = A[:, col]
+        A[:, col] = (linha_piv * inversos[linha_piv[:, col]][:, None]) % p
+        fator = A[:, :, col].copy()
+        fator[:, col] = 0
+        # As colunas à esquerda de col já são da identidade e não mudam
+        A[:, :, col:] = (A[:, :, col:] - fator[:, :, None] * A[:, None, col, col:]) % p
+    return A[:, :, k:].astype(np.int64), invertivel
+
+
+def sortear_invertiveis_mod_primo(rng, quantidade, k, p, triangular=False):
+    # Rejeição em lote: matrizes uniformes mod p, ficam só as invertíveis
+    # (triangulares com diagonal não nula já são todas invertíveis)
+    # Fração das matrizes k x k invertíveis mod p: prod(1 - p^-i)
+    aceitas = np.prod(1 - float(p) ** -np.arange(1, k + 1)) if not triangular else 1.0
+    chaves, inversas = [], []
+    faltam = quantidade
+    while faltam > 0:
+        M = rng.integers(0, p, (int(1.1 * faltam / aceitas) + 8, k, k))
+        if triangular:
+            M = np.triu(M)
+            M[:, np.arange(k), np.arange(k)] = rng.integers(1, p, (len(M), k))
+        inv, invertivel = inversas_mod_primo(M, p)
+        chaves.append(M[invertivel][:faltam])
+        inversas.append(inv[invertivel][:faltam])
+        faltam -= len(chaves[-1])
+    return np.concatenate(chaves), np.concatenate(inversas)
+
+
+def sortear_chaves_hill(quantidade, k, triangular=False, rng=None):
+    """Sorteia `quantidade` chaves de Hill k x k invertíveis mod 26 e suas inversas.
+
+    Uniforme entre todas as invertíveis ou, com triangular=True, entre as
+    triangulares superiores invertíveis (como as do enc_hill). Sem `rng`,
+    usa a semente global do np.random, como o resto do script.
+    Devolve (chaves, inversas), arrays uint8 (quantidade, k, k).
+    """
+    if rng is None:
+        rng = np.random.default_rng(np.random.randint(0, 2**31))
+    chaves_2, inversas_2 = sortear_invertiveis_mod_primo(rng, quantidade, k, 2, triangular)
+    chaves_13, inversas_13 = sortear_invertiveis_mod_primo(rng, quantidade, k, 13, triangular)
+    # x = 13 * x2 + 14 * x13 (mod 26): x = x2 (mod 2) e x = x13 (mod 13)
+    chaves = (13 * chaves_2 + 14 * chaves_13) % 26
+    inversas = (13 * inversas_2 + 14 * inversas_13) % 26
+    return chaves.astype(np.uint8), inversas.astype(np.uint8)
+
+
 def enc_hill(conteudo, tamanho, grupo, k):
     n = len(conteudo) - tamanho + 1
     r = np.random.randint(0, n)
@@ -94,30 +161,10 @@ def enc_hill(conteudo, tamanho, grupo, k):
     alf2dec = {az[i]: i for i in range(26)}
     dec2alf = {i: az[i] for i in range(26)}
 
-    while True:
-        # Gera uma matriz triangular superior
-        # key = [[0] * k for _ in range(k)]
-        key = np.zeros((k, k))
-        for i in range(k):
-            for j in range(i, k):
-                if i == j:
-                    # Garante que os elementos da diagonal sejam coprimos com 26
-                    while True:
-                        element = random.randint(1, 25)
-                        if math.gcd(element, 26) == 1:
-                            key[i][j] = element
-                            break
-                else:
-                    key[i][j] = random.randint(0, 25)
-
-        # Calcula o determinante
-        det = int(round(np.linalg.det(key)))
-
-        # Verifica se o determinante é coprimo com 26
-        if math.gcd(det, 26) == 1:
-            break
-        else:
-            print("bug")
+    # Gera uma matriz triangular superior invertível mod 26 (sem rejeição
+    # pelo determinante em ponto flutuante); float mantém o formato do key.txt
+    key, _ = sortear_chaves_hill(1, k, triangular=True)
+    key = key[0].astype(float)
 
     texto_numerico = [alf2dec[i] for i in texto_aberto]
     texto_cifrado = np.array(texto_numerico).reshape((int(tamanho / k), k)).T
@@ -173,6 +220,92 @@ def enc_vigenere(conteudo, tamanho, grupo, k):
     )
 
 
+# Geração em lote: muitos desafios de uma vez, com semente fixa, cifrados em
+# lote pelo NumPy e gravados em um único arquivo .npz indexado pelo número do
+# desafio (em vez de três arquivos pequenos por desafio).
+
+CIFRAS_LOTE = [("mono", None), ("hill", 2), ("hill", 3), ("hill", 4), ("hill", 5),
+               ("vigenere", 20), ("vigenere", 30), ("vigenere", 40), ("vigenere", 60)]
+
+
+def carregar_textos(diretorio):
+    # Todos os .txt do diretório (já passados por parse), como arrays 0..25
+    arquivos = sorted(a for a in os.listdir(diretorio) if a.endswith(".txt"))
+    textos = []
+    for arquivo in arquivos:
+        conteudo = parse(diretorio + "/" + arquivo)
+        textos.append(np.frombuffer(conteudo.encode("ascii"), dtype=np.uint8) - ord("a"))
+    return arquivos, textos
+
+
+def sortear_janelas(textos, quantidade, tamanho, rng):
+    # Como no main: sorteia um arquivo e depois uma janela de `tamanho` letras nele
+    validos = [i for i, t in enumerate(textos) if len(t) >= tamanho]
+    if not validos:
+        raise ValueError("Nenhum texto com pelo menos %d letras." % tamanho)
+    arquivo = np.array(validos)[rng.integers(0, len(validos), quantidade)]
+    corpus = np.concatenate([textos[i] for i in validos])
+    inicio_arquivo = np.zeros(len(textos), dtype=np.int64)
+    inicio_arquivo[validos] = np.cumsum([0] + [len(textos[i]) for i in validos[:-1]])
+    limite = np.array([len(t) - tamanho + 1 for t in textos])[arquivo]
+    r = (rng.random(quantidade) * limite).astype(np.int64)
+    janelas = corpus[(inicio_arquivo[arquivo] + r)[:, None] + np.arange(tamanho)]
+    return janelas, arquivo, r
+
+
+def cifrar_lote(cifra, k, abertos, rng, hill_triangular=True):
+    # Devolve (chaves, cifrados, inversas) para um lote (quantidade, tamanho) de textos 0..25
+    quantidade, tamanho = abertos.shape
+    if cifra == "mono":
+        # chave[i] = letra cifrada da letra clara i
+        chaves = np.argsort(rng.random((quantidade, 26)), axis=1).astype(np.uint8)
+        inversas = np.argsort(chaves, axis=1).astype(np.uint8)
+        return chaves, np.take_along_axis(chaves, abertos.astype(np.intp), axis=1), inversas
+    if cifra == "hill":
+        if tamanho % k != 0:
+            raise ValueError("O tamanho %d não é múltiplo de k=%d." % (tamanho, k))
+        chaves, inversas = sortear_chaves_hill(quantidade, k, hill_triangular, rng)
+        blocos = abertos.reshape(quantidade, tamanho // k, k).astype(np.int64)
+        cifrados = np.einsum("qij,qbj->qbi", chaves.astype(np.int64), blocos) % 26
+        return chaves, cifrados.reshape(quantidade, tamanho).astype(np.uint8), inversas
+    chaves = rng.integers(0, 26, (quantidade, k)).astype(np.uint8)
+    return chaves, (abertos + chaves[:, np.arange(tamanho) % k]) % 26, (26 - chaves) % 26
+
+
+def gerar_lote(diretorio, quantidade, semente, tamanho=120, saida="desafios.npz", cifras=CIFRAS_LOTE,
+               hill_triangular=True):
+    """Gera `quantidade` desafios de cada cifra e grava tudo em `saida` (.npz).
+
+    Para cada cifra (ex.: "hill3", "vigenere20", "mono") o arquivo tem os
+    arrays <nome>_aberto e <nome>_cifrado (quantidade, tamanho), <nome>_chave
+    e <nome>_inversa (26 para Mono, k x k para Hill, k para Vigenère), e
+    <nome>_arquivo / <nome>_inicio com a origem de cada janela em `arquivos`.
+    Letras 0..25. As chaves de Hill são triangulares como as do enc_hill, ou
+    cheias (uniformes entre as invertíveis) com hill_triangular=False.
+    """
+    rng = np.random.default_rng(semente)
+    arquivos, textos = carregar_textos(diretorio)
+    lote = {"arquivos": np.array(arquivos), "semente": np.array(semente), "tamanho": np.array(tamanho)}
+    for cifra, k in cifras:
+        nome = cifra + (str(k) if k else "")
+        abertos, arquivo, inicio = sortear_janelas(textos, quantidade, tamanho, rng)
+        chaves, cifrados, inversas = cifrar_lote(cifra, k, abertos, rng, hill_triangular)
+        lote[nome + "_aberto"] = abertos.astype(np.uint8)
+        lote[nome + "_cifrado"] = cifrados.astype(np.uint8)
+        lote[nome + "_chave"] = chaves
+        lote[nome + "_inversa"] = inversas
+        lote[nome + "_arquivo"] = arquivo
+        lote[nome + "_inicio"] = inicio
+    np.savez_compressed(saida, **lote)
+    print("%d desafios de %d cifras gravados em %s" % (quantidade, len(cifras), saida))
+
+
+def ler_desafio(lote, nome, i):
+    # Desafio i de um lote carregado com np.load: (chave, texto aberto, texto cifrado)
+    texto = lambda v: "".join(string.ascii_lowercase[c] for c in v)
+    return lote[nome + "_chave"][i], texto(lote[nome + "_aberto"][i]), texto(lote[nome + "_cifrado"][i])
+
+
 def main():
 
     group = "Grupo21"
@@ -224,4 +357,16 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lote", type=int, help="gera N desafios de cada cifra em um único .npz")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--tamanho", type=int, default=120)
+    parser.add_argument("--saida", default="desafios.npz")
+    parser.add_argument("--hill-cheia", action="store_true", help="chaves de Hill cheias em vez de triangulares")
+    args = parser.parse_args()
+
+    if args.lote:
+        gerar_lote("textos", args.lote, args.semente, args.tamanho, args.saida,
+                   hill_triangular=not args.hill_cheia)
+    else:
+        main()
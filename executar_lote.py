@@ -0,0 +1,176 @@
+"""Resolve de uma vez todos os desafios de um diretório no formato do GeraEP1.
+
+Procura Cifrado/{Mono,Hill,Vigenere}/*_texto_cifrado.txt sob a raiz de dados e
+manda cada arquivo para o resolvedor certo, em um pool de processos: se o
+texto aberto correspondente existe em Aberto/ (textos conhecidos), usa as
+soluções de textos_conhecidos_solucao; senão, os ataques de
+textos_desconhecidos_solucao. O modelo de linguagem é carregado uma única
+vez por processo, e cada resultado vira uma linha do relatório JSONL. Com
+TELEMETRIA=<arquivo de trace>, os contadores de cada processo do pool voltam
+com o resultado e são somados no trace do processo principal.
+
+Uso:
+    python executar_lote.py <raiz_dados> [--saida relatorio.jsonl] [--workers N]
+"""
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+CIFRAS = ('Mono', 'Hill', 'Vigenere')
+
+sys.path.insert(0, os.path.join(RAIZ, 'textos_desconhecidos_solucao'))
+import telemetria
+
+# Scripts de cada resolvedor (vários se chamam main.py: carregados por caminho)
+SCRIPTS = {
+    ('Mono', 'conhecido'): 'textos_conhecidos_solucao/Mono/main.py',
+    ('Hill', 'conhecido'): 'textos_conhecidos_solucao/Hill/main.py',
+    ('Vigenere', 'conhecido'): 'textos_conhecidos_solucao/Vigenere/main.py',
+    ('Mono', 'desconhecido'): 'textos_desconhecidos_solucao/mono/main.py',
+    ('Hill', 'desconhecido'): 'textos_desconhecidos_solucao/hill/hilltriangular.py',
+    ('Vigenere', 'desconhecido'): 'textos_desconhecidos_solucao/vigenere/vigenere_final.py',
+}
+
+_modulos = {}
+
+def carregar_resolvedor(cifra, modo):
+    """Importa (uma vez por processo) o script do resolvedor."""
+    if (cifra, modo) not in _modulos:
+        caminho = os.path.join(RAIZ, SCRIPTS[cifra, modo])
+        # Como ao rodar o script direto: seu diretório entra no path (módulos vizinhos)
+        if os.path.dirname(caminho) not in sys.path:
+            sys.path.insert(0, os.path.dirname(caminho))
+        spec = importlib.util.spec_from_file_location(f"resolvedor_{cifra.lower()}_{modo}", caminho)
+        modulo = importlib.util.module_from_spec(spec)
+        # Os scripts imprimem bastante ao carregar o modelo; o relatório é o JSONL
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec.loader.exec_module(modulo)
+        _modulos[cifra, modo] = modulo
+    return _modulos[cifra, modo]
+
+def _iniciar_worker(modos, contar):
+    if contar:
+        telemetria.ativar_worker()
+    for cifra in CIFRAS:
+        for modo in modos:
+            carregar_resolvedor(cifra, modo)
+
+def encontrar_desafios(raiz_dados):
+    """Lista de desafios: dicts com cifra, grupo, k e caminhos dos arquivos."""
+    desafios = []
+    for cifra in CIFRAS:
+        for cifrado in sorted(glob.glob(os.path.join(raiz_dados, 'Cifrado', cifra, '*_texto_cifrado.txt'))):
+            nome = os.path.basename(cifrado)[:-len('_texto_cifrado.txt')]
+            m = re.fullmatch(r'(.+?)(?:_(\d+))?', nome)
+            aberto = os.path.join(raiz_dados, 'Aberto', cifra, f'{nome}_texto_aberto.txt')
+            desafios.append({
+                'cifra': cifra,
+                'grupo': m.group(1),
+                'k': int(m.group(2)) if m.group(2) else None,
+                'arquivo': cifrado,
+                'aberto': aberto if os.path.exists(aberto) else None,
+            })
+    return desafios
+
+def _ler(caminho):
+    with open(caminho, 'r') as f:
+        return f.read().strip()
+
+def _resolver_conhecido(cifra, k, cipher, plain):
+    modulo = carregar_resolvedor(cifra, 'conhecido')
+    if cifra == 'Mono':
+        mapa = modulo.mono_key_by_frequency(plain, cipher)
+        chave = ''.join(mapa[chr(ord('a') + i)] for i in range(26))
+        return chave, modulo.decrypt_mono(cipher, mapa)
+    if cifra == 'Vigenere':
+        _, chave = modulo.extract_vigenere_key(plain, cipher, key_length=k)
+        plain_n = [(ord(c) - ord(x)) % 26 for c, x in zip(cipher, modulo.expand_vigenere_key(chave, len(cipher)))]
+        return chave, modulo.numeric_to_text(plain_n)
+    # Hill: decifra o texto cifrado com K^-1, como no Vigenère, em vez de devolver o aberto
+    from utils import inversas_mod26, numeric_to_text  # o diretório do resolvedor já está no sys.path
+    K, _ = modulo.find_valid_hill_key(modulo.text_to_numeric(plain), modulo.text_to_numeric(cipher), k)
+    inversa, invertivel = inversas_mod26(K)
+    if not invertivel:
+        return K.tolist(), None
+    cifra = np.array(modulo.text_to_numeric(cipher) + [0] * (-len(cipher) % k)).reshape(-1, k)
+    return K.tolist(), numeric_to_text(((cifra @ inversa.T) % 26).ravel()[:len(cipher)])
+
+def _resolver_desconhecido(cifra, k, cipher):
+    modulo = carregar_resolvedor(cifra, 'desconhecido')
+    if cifra == 'Mono':
+        chave, texto, _ = modulo.ataque_jakobsen(cipher)
+        return chave, texto
+    if cifra == 'Vigenere':
+        chave, texto, _ = modulo.decifrar_automatico(cipher, k)
+        return chave, texto
+    # Ataque em estágios para chaves triangulares (as do GeraEP1) e NxN para
+    # chaves cheias; fica o melhor score de n-gramas dos dois
+    import hillnxn  # o diretório do resolvedor já está no sys.path
+    resultados = modulo.ataque_hill_triangular(cipher, k) + hillnxn.ataque_hill_nxn(cipher, k)
+    resultados.sort(key=lambda r: -r[1])
+    if not resultados:
+        return None, None
+    texto, _, _, _, chave = resultados[0]
+    return np.asarray(chave).tolist(), texto
+
+def resolver(desafio, modo='auto'):
+    """Resolve um desafio e devolve a linha do relatório."""
+    inicio = time.perf_counter()
+    linha = dict(desafio)
+    try:
+        cipher = _ler(desafio['arquivo'])
+        plain = _ler(desafio['aberto']) if desafio['aberto'] else None
+        usar_conhecido = modo == 'conhecido' or (modo == 'auto' and plain is not None)
+        linha['modo'] = 'conhecido' if usar_conhecido else 'desconhecido'
+        with contextlib.redirect_stdout(io.StringIO()):
+            if usar_conhecido:
+                chave, texto = _resolver_conhecido(desafio['cifra'], desafio['k'], cipher, plain)
+            else:
+                chave, texto = _resolver_desconhecido(desafio['cifra'], desafio['k'], cipher)
+        linha.update(chave=chave, texto=texto, sucesso=(texto == plain) if plain is not None else None)
+    except Exception as e:
+        linha.update(erro=f"{type(e).__name__}: {e}")
+    linha['segundos'] = round(time.perf_counter() - inicio, 3)
+    return linha
+
+def _resolver_worker(desafio, modo):
+    """resolver em um processo do pool, devolvendo também os contadores da telemetria."""
+    return resolver(desafio, modo), telemetria.coletar()
+
+def executar_lote(raiz_dados, saida='relatorio.jsonl', max_workers=None, modo='auto'):
+    desafios = encontrar_desafios(raiz_dados)
+    print(f"[*] {len(desafios)} desafios em {raiz_dados}")
+    modos = ('conhecido', 'desconhecido') if modo == 'auto' else (modo,)
+    inicio = time.perf_counter()
+    with open(saida, 'w') as relatorio, \
+            ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_worker,
+                                initargs=(modos, telemetria.ativa)) as executor:
+        futuros = [executor.submit(_resolver_worker, d, modo) for d in desafios]
+        for futuro in as_completed(futuros):
+            linha, contadores = futuro.result()
+            telemetria.somar(contadores)
+            relatorio.write(json.dumps(linha, ensure_ascii=False) + '\n')
+            relatorio.flush()
+            status = linha.get('erro') or ('ok' if linha.get('sucesso') else linha.get('sucesso'))
+            print(f"[{linha['segundos']:8.2f}s] {os.path.basename(linha['arquivo'])}: {status}")
+    print(f"[*] Total: {time.perf_counter() - inicio:.2f}s, relatório em {saida}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('raiz_dados', help="diretório com Cifrado/ (e Aberto/, se os textos forem conhecidos)")
+    parser.add_argument('--saida', default='relatorio.jsonl')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--modo', choices=('auto', 'conhecido', 'desconhecido'), default='auto')
+    args = parser.parse_args()
+    executar_lote(args.raiz_dados, args.saida, args.workers, args.modo)
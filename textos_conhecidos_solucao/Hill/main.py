@@ -1,37 +1,75 @@
-# Hill 2x2: primeiro par de blocos
+# Hill NxN: todos os pares de blocos do texto de uma vez
 import sys
 import os
+import glob
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import normalize, text_to_numeric, chunkify, modinv_matrix
+from utils import normalize, text_to_numeric, chunkify, FATORES_MOD, escalonar_mod_primo, juntar_crt
 import numpy as np
 
+DIRETORIO = "/home/bernardo/Desktop/faculdade/SEGIN/data/textos_desconhecidos"
 block_size = 4
 
-with open(f"/home/bernardo/Desktop/faculdade/SEGIN/data/textos_desconhecidos/Aberto/Hill/Grupo21_{block_size}_texto_aberto.txt", "r") as f:
-    plain = f.read().strip()
-with open(f"/home/bernardo/Desktop/faculdade/SEGIN/data/textos_desconhecidos/Cifrado/Hill/Grupo21_{block_size}_texto_cifrado.txt", "r") as f:
-    cipher = f.read().strip()
+def resolver_hill_lote(planos_n, cifrados_n, block_size):
+    """Resolve K·P = C (mod 26) para vários textos de uma vez.
 
-# Normalização e conversão
-plain_n = text_to_numeric(normalize(plain))
-cipher_n = text_to_numeric(normalize(cipher))
-def find_valid_hill_key(plain_n, cipher_n, block_size, mod=26):
-    step = block_size  # desliza de bloco em bloco
-    max_index = len(plain_n) - block_size**2 + 1
+    Para cada texto, todos os pares de blocos (p, c) entram no sistema
+    P^T · K^T = C^T, escalonado separadamente mod 2 e mod 13: cada primo
+    escolhe seus próprios blocos independentes, em qualquer parte do texto,
+    e as duas soluções são juntadas pelo Teorema Chinês do Resto.
+    Devolve (chaves (B, n, n), resolvido (B,)); a chave só vale onde resolvido
+    é True, o que inclui conferir K em todos os blocos do texto.
+    """
+    n = block_size
+    if not planos_n:
+        return np.zeros((0, n, n), dtype=np.int64), np.zeros(0, dtype=bool)
+    n_blocos = [min(len(p), len(c)) // n for p, c in zip(planos_n, cifrados_n)]
+    # Textos mais curtos são completados com blocos nulos, que não mudam o sistema
+    sistemas = np.zeros((len(planos_n), max(max(n_blocos), n), 2 * n), dtype=np.int64)
+    for i, (p, c) in enumerate(zip(planos_n, cifrados_n)):
+        sistemas[i, :n_blocos[i], :n] = np.array(chunkify(p[:n_blocos[i] * n], n))
+        sistemas[i, :n_blocos[i], n:] = np.array(chunkify(c[:n_blocos[i] * n], n))
+
+    partes, resolvido = [], np.ones(len(sistemas), dtype=bool)
+    for p in FATORES_MOD:
+        reduzidos, completo, _ = escalonar_mod_primo(sistemas, n, p)
+        partes.append(reduzidos[:, :n, n:])
+        resolvido &= completo
+    chaves = juntar_crt(partes).transpose(0, 2, 1)
 
-    for i in range(0, max_index, step):
-        try:
-            P_block = np.array(chunkify(plain_n[i:i + block_size**2], block_size)).T
-            C_block = np.array(chunkify(cipher_n[i:i + block_size**2], block_size)).T
-            P_inv = modinv_matrix(P_block, mod)
-            K = (C_block @ P_inv) % mod
-            return K, i
-        except ValueError:
-            continue
-    raise Exception(f"Nenhum bloco invertível encontrado para Hill {block_size}x{block_size}.")
+    # Confere cada chave contra todos os blocos em um único produto
+    P, C = sistemas[:, :, :n], sistemas[:, :, n:]
+    resolvido &= (np.einsum('kij,kbj->kbi', chaves, P) % 26 == C).all(axis=(1, 2))
+    return chaves, resolvido
+
+def find_valid_hill_key(plain_n, cipher_n, block_size, mod=26):
+    """(K, índice inicial), como antes; o índice é sempre 0, pois o texto inteiro entra no sistema."""
+    chaves, resolvido = resolver_hill_lote([plain_n], [cipher_n], block_size)
+    if not resolvido[0]:
+        raise Exception(f"Blocos insuficientes para determinar a chave Hill {block_size}x{block_size}.")
+    return chaves[0], 0
 
-# Executa a busca
-K_NxN, start_idx = find_valid_hill_key(plain_n, cipher_n, block_size=block_size)
-print(f"Chave encontrada (a partir do índice {start_idx}):\n{K_NxN}")
+def carregar_pares(diretorio, block_size):
+    """Pares (nome, texto claro, texto cifrado) de todos os grupos com chave block_size."""
+    pares = []
+    for aberto in sorted(glob.glob(f"{diretorio}/Aberto/Hill/*_{block_size}_texto_aberto.txt")):
+        nome = os.path.basename(aberto)[:-len("_texto_aberto.txt")]
+        with open(aberto, "r") as f:
+            plain = f.read().strip()
+        with open(f"{diretorio}/Cifrado/Hill/{nome}_texto_cifrado.txt", "r") as f:
+            cipher = f.read().strip()
+        pares.append((nome, plain, cipher))
+    return pares
 
+if __name__ == "__main__":
+    # Normalização e conversão
+    pares = carregar_pares(DIRETORIO, block_size)
+    planos_n = [text_to_numeric(normalize(plain)) for _, plain, _ in pares]
+    cifrados_n = [text_to_numeric(normalize(cipher)) for _, _, cipher in pares]
 
+    # Executa a busca em todos os arquivos de uma vez
+    chaves, resolvido = resolver_hill_lote(planos_n, cifrados_n, block_size)
+    for (nome, _, _), K_NxN, ok in zip(pares, chaves, resolvido):
+        if ok:
+            print(f"Chave encontrada ({nome}):\n{K_NxN}")
+        else:
+            print(f"Blocos insuficientes para determinar a chave ({nome}).")
@@ -39,17 +39,18 @@ def decrypt_mono(cipher_text, key_map):
     return ''.join(decrypted)
 
 
-plain_mono = "manhaocaboalmeidaperguntaoqueelesestaofazendoaliaaquelahoraasarmasestaoapontadasparaelesenquantoestaocomasmaosnacabecaoc"
-cipher_mono = "cbetbvrbzvbdcimpbwiygfejbvsfiidikikjbvnbuiepvbdmbbsfidbtvybbkbycbkikjbvbwvejbpbkwbybidikiesfbejvikjbvrvcbkcbvkebrbzirbvr"
-# Chave: letra cifrada → estimativa da letra clara
-mono_key = mono_key_by_frequency(
-    plain_mono,
-    cipher_mono
-)
-
-# Aplicando descriptografia
-plain_mono_est = decrypt_mono(cipher_mono, mono_key)
-
-print("🔓 Texto descriptografado (estimado):")
-print(plain_mono_est)
-print("Textos idênticos: ", plain_mono == plain_mono_est)
+if __name__ == "__main__":
+    plain_mono = "manhaocaboalmeidaperguntaoqueelesestaofazendoaliaaquelahoraasarmasestaoapontadasparaelesenquantoestaocomasmaosnacabecaoc"
+    cipher_mono = "cbetbvrbzvbdcimpbwiygfejbvsfiidikikjbvnbuiepvbdmbbsfidbtvybbkbycbkikjbvbwvejbpbkwbybidikiesfbejvikjbvrvcbkcbvkebrbzirbvr"
+    # Chave: letra cifrada → estimativa da letra clara
+    mono_key = mono_key_by_frequency(
+        plain_mono,
+        cipher_mono
+    )
+
+    # Aplicando descriptografia
+    plain_mono_est = decrypt_mono(cipher_mono, mono_key)
+
+    print("🔓 Texto descriptografado (estimado):")
+    print(plain_mono_est)
+    print("Textos idênticos: ", plain_mono == plain_mono_est)
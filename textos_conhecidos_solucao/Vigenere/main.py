@@ -19,20 +19,20 @@ def expand_vigenere_key(key_text, length):
     return (key_text * repeats)[:length]
 
 
-k_len = 60
-
-with open(f"/home/bernardo/Desktop/faculdade/SEGIN/data/textos_conhecidos/Aberto/Vigenere/Grupo21_{k_len}_texto_aberto.txt", "r") as f:
-    plain = f.read().strip()
-with open(f"/home/bernardo/Desktop/faculdade/SEGIN/data/textos_conhecidos/Cifrado/Vigenere/Grupo21_{k_len}_texto_cifrado.txt", "r") as f:
-    cipher = f.read().strip()
-with open(f"/home/bernardo/Desktop/faculdade/SEGIN/data/textos_conhecidos/Aberto/Vigenere/Grupo21_{k_len}_key.txt", "r") as f:
-    key_cipher = f.read().strip()
-
-
-text_length = len(plain)
-key_nums, key_text = extract_vigenere_key(plain, cipher, key_length=k_len)
-key_expanded = expand_vigenere_key(key_text, text_length)
-print(f"🔐 Chave Vigenère (tamanho {k_len}): {key_text}")
-print(f"🔐 Chave Vigenère Expandida (tamanho {k_len}): {key_expanded}")
-print(f"Chaves idênticas: {key_cipher == key_expanded}")
-
+if __name__ == "__main__":
+    k_len = 60
+
+    with open(f"/home/bernardo/Desktop/faculdade/SEGIN/data/textos_conhecidos/Aberto/Vigenere/Grupo21_{k_len}_texto_aberto.txt", "r") as f:
+        plain = f.read().strip()
+    with open(f"/home/bernardo/Desktop/faculdade/SEGIN/data/textos_conhecidos/Cifrado/Vigenere/Grupo21_{k_len}_texto_cifrado.txt", "r") as f:
+        cipher = f.read().strip()
+    with open(f"/home/bernardo/Desktop/faculdade/SEGIN/data/textos_conhecidos/Aberto/Vigenere/Grupo21_{k_len}_key.txt", "r") as f:
+        key_cipher = f.read().strip()
+
+
+    text_length = len(plain)
+    key_nums, key_text = extract_vigenere_key(plain, cipher, key_length=k_len)
+    key_expanded = expand_vigenere_key(key_text, text_length)
+    print(f"🔐 Chave Vigenère (tamanho {k_len}): {key_text}")
+    print(f"🔐 Chave Vigenère Expandida (tamanho {k_len}): {key_expanded}")
+    print(f"Chaves idênticas: {key_cipher == key_expanded}")
@@ -0,0 +1,78 @@
+"""Álgebra mod 26 em lote para as matrizes de Hill.
+
+26 = 2 * 13 não é primo, então inversas e determinantes saem de uma
+eliminação de Gauss-Jordan mod 2 e outra mod 13, feitas em uma pilha
+inteira de matrizes de uma vez, e juntadas pelo Teorema Chinês do Resto.
+"""
+import numpy as np
+
+MOD = 26
+FATORES_MOD = (2, 13)
+
+# Inverso multiplicativo mod p de cada valor (0 para o zero)
+INVERSOS_MOD = {p: np.array([0] + [pow(a, -1, p) for a in range(1, p)]) for p in FATORES_MOD}
+
+def juntar_crt(residuos):
+    """Junta os resíduos mod 2 e mod 13 (na ordem de FATORES_MOD) em um valor mod 26."""
+    total = 0
+    for p, r in zip(FATORES_MOD, residuos):
+        q = MOD // p
+        total = total + r * (q * pow(q, -1, p))
+    return total % MOD
+
+def escalonar_mod_primo(matrizes, n_colunas, p):
+    """Gauss-Jordan mod p (primo) em uma pilha de matrizes (B, m, c), todas de uma vez.
+
+    Pivoteia as n_colunas primeiras colunas, trocando linhas quando preciso.
+    Devolve (reduzidas, posto_completo, det): onde posto_completo é True as
+    n_colunas primeiras linhas formam a identidade; det é o determinante mod p
+    do bloco quadrado pivotado (quando m == n_colunas).
+    """
+    A = np.array(matrizes, dtype=np.int64) % p
+    B = A.shape[0]
+    lotes = np.arange(B)
+    inversos = INVERSOS_MOD[p]
+    completo = np.ones(B, dtype=bool)
+    det = np.ones(B, dtype=np.int64)
+    for j in range(n_colunas):
+        candidatos = A[:, j:, j] != 0
+        completo &= candidatos.any(axis=1)
+        pivo_linha = j + candidatos.argmax(axis=1)
+        det = np.where(pivo_linha != j, -det, det)
+        linha_j = A[lotes, j].copy()
+        A[lotes, j] = A[lotes, pivo_linha]
+        A[lotes, pivo_linha] = linha_j
+
+        pivo = A[:, j, j]
+        det = det * pivo % p
+        A[:, j] = A[:, j] * inversos[pivo][:, None] % p
+        fator = A[:, :, j].copy()
+        fator[:, j] = 0
+        A = (A - fator[:, :, None] * A[:, j][:, None, :]) % p
+    return A, completo, det % p
+
+def inversas_mod26(matrizes):
+    """Inversas mod 26 de uma pilha (B, n, n) de matrizes inteiras (ou de uma só).
+
+    Devolve (inversas, invertivel); onde invertivel é False a inversa não vale.
+    """
+    M = np.asarray(matrizes, dtype=np.int64)
+    unica = M.ndim == 2
+    M = M.reshape((-1,) + M.shape[-2:])
+    n = M.shape[-1]
+    aumentada = np.concatenate([M, np.broadcast_to(np.eye(n, dtype=np.int64), M.shape)], axis=2)
+    partes, invertivel = [], np.ones(len(M), dtype=bool)
+    for p in FATORES_MOD:
+        reduzida, completo, _ = escalonar_mod_primo(aumentada, n, p)
+        partes.append(reduzida[:, :, n:])
+        invertivel &= completo
+    inversas = juntar_crt(partes)
+    if unica:
+        return inversas[0], bool(invertivel[0])
+    return inversas, invertivel
+
+def determinantes_mod26(matrizes):
+    """Determinante mod 26 de uma pilha (B, n, n) de matrizes inteiras."""
+    M = np.asarray(matrizes, dtype=np.int64)
+    M = M.reshape((-1,) + M.shape[-2:])
+    return juntar_crt([escalonar_mod_primo(M, M.shape[-1], p)[2] for p in FATORES_MOD])
@@ -0,0 +1,192 @@
+"""Busca de palavras do dicionário por autômato de Aho-Corasick.
+
+O autômato é montado uma única vez junto com o modelo de linguagem e
+guardado como uma tabela de transições densa (estado x letra, com as
+transições de falha já resolvidas) e uma máscara de saída por estado: o
+bit L da máscara indica que uma palavra de L letras termina ali.
+
+Uma única passada linear sobre o texto devolve, para cada posição, os
+comprimentos das palavras que terminam nela; daí saem todas as ocorrências,
+a contagem, a cobertura e a maior palavra que começa em cada posição.
+O lote (uma linha por texto candidato) é varrido em paralelo, e textos
+longos são partidos em blocos sobrepostos varridos ao mesmo tempo.
+"""
+from functools import cached_property
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from modelo_linguagem import carregar_modelo, codificar
+
+MOD = 26
+# Símbolo extra que leva qualquer estado de volta à raiz
+SENTINELA = MOD
+MAX_COMPRIMENTO = 63
+
+def construir_automato(palavras, max_len=MAX_COMPRIMENTO):
+    """Devolve (delta, saida) do autômato das palavras a-z de até ``max_len`` letras."""
+    palavras = sorted({p for p in palavras if 0 < len(p) <= max_len})
+    prefixos = {''}
+    for p in palavras:
+        prefixos.update(p[:i] for i in range(1, len(p) + 1))
+    # Ordem por comprimento = ordem da busca em largura
+    ordem = sorted(prefixos, key=lambda s: (len(s), s))
+    ids = {s: i for i, s in enumerate(ordem)}
+    n_estados = len(ordem)
+
+    filho = np.full((n_estados, MOD), -1, dtype=np.int32)
+    for s in ordem[1:]:
+        filho[ids[s[:-1]], ord(s[-1]) - ord('a')] = ids[s]
+    saida = np.zeros(n_estados, dtype=np.uint64)
+    for p in palavras:
+        saida[ids[p]] |= np.uint64(1 << len(p))
+    profundidade = np.array([len(s) for s in ordem])
+
+    delta = np.zeros((n_estados, MOD + 1), dtype=np.int32)
+    falha = np.zeros(n_estados, dtype=np.int32)
+    delta[0, :MOD] = np.maximum(filho[0], 0)
+    # Nível a nível: a falha de um estado está num nível menor, já resolvido.
+    # A coluna SENTINELA fica em 0 (raiz) para todos os estados.
+    for nivel in range(1, profundidade.max() + 1):
+        estados = np.flatnonzero(profundidade == nivel)
+        saida[estados] |= saida[falha[estados]]
+        delta[estados, :MOD] = np.where(filho[estados] >= 0, filho[estados], delta[falha[estados], :MOD])
+        linhas, letras = np.nonzero(filho[estados] >= 0)
+        falha[filho[estados[linhas], letras]] = delta[falha[estados[linhas]], letras]
+    return delta, saida
+
+class Varredura:
+    """Resultado de uma passada do autômato sobre um lote (B textos de n letras).
+
+    As estatísticas derivadas são calculadas só quando consultadas.
+    """
+
+    def __init__(self, mascaras, min_len, max_len):
+        faixa = ((1 << (max_len + 1)) - 1) ^ ((1 << min_len) - 1)
+        self.mascaras = mascaras & np.uint64(faixa)
+        self.min_len, self.max_len = min_len, max_len
+
+    def _por_inicio(self):
+        B, n = self.mascaras.shape
+        inicios = np.zeros((B, n), dtype=np.int32)
+        mais_longa = np.zeros((B, n), dtype=np.int32)
+        for L in range(self.min_len, min(self.max_len, n) + 1):
+            tem = ((self.mascaras[:, L - 1:] >> np.uint64(L)) & np.uint64(1)).astype(bool)
+            inicios[:, :n - L + 1] += tem
+            mais_longa[:, :n - L + 1][tem] = L
+        self.__dict__['inicios'], self.__dict__['mais_longa'] = inicios, mais_longa
+
+    @cached_property
+    def inicios(self):
+        """inicios[b, i]: quantas palavras começam na posição i."""
+        self._por_inicio()
+        return self.__dict__['inicios']
+
+    @cached_property
+    def mais_longa(self):
+        """mais_longa[b, i]: tamanho da maior palavra que começa em i (0 se nenhuma)."""
+        self._por_inicio()
+        return self.__dict__['mais_longa']
+
+    @cached_property
+    def contagem(self):
+        """Total de ocorrências de palavras em cada texto."""
+        if hasattr(np, 'bitwise_count'):
+            return np.bitwise_count(self.mascaras).sum(axis=1, dtype=np.int64)
+        return self.inicios.sum(axis=1)
+
+    def cobertura(self):
+        """Fração das letras de cada texto coberta por alguma palavra."""
+        B, n = self.mais_longa.shape
+        if n == 0:
+            return np.zeros(B)
+        pos = np.arange(n)
+        alcance = np.where(self.mais_longa > 0, pos + self.mais_longa, 0)
+        return (np.maximum.accumulate(alcance, axis=1) > pos).mean(axis=1)
+
+    def acertos(self, linha=0):
+        """Todas as ocorrências (início, tamanho) de palavras no texto da linha."""
+        resultado = []
+        for L in range(self.min_len, self.max_len + 1):
+            tem = (self.mascaras[linha, L - 1:] >> np.uint64(L)) & np.uint64(1)
+            resultado.extend((int(i), L) for i in np.flatnonzero(tem))
+        return sorted(resultado)
+
+    def segmentar(self, linha=0):
+        """Segmentação gulosa pela maior palavra a partir de cada posição: [(início, tamanho)]."""
+        mais_longa = self.mais_longa[linha].tolist()
+        i, tokens = 0, []
+        while i < len(mais_longa):
+            if mais_longa[i]:
+                tokens.append((i, mais_longa[i]))
+                i += mais_longa[i]
+            else:
+                i += 1
+        return tokens
+
+class Automato:
+    """Autômato de Aho-Corasick compilado (tabelas densas, possivelmente em memory map)."""
+
+    def __init__(self, delta, saida):
+        self.delta = np.asarray(delta).ravel()
+        self.saida = np.asarray(saida)
+        self.largura = np.asarray(delta).shape[1]
+
+    def mascaras(self, lote, max_len=MAX_COMPRIMENTO):
+        """Máscaras de comprimento das palavras (até ``max_len``) que terminam em cada posição."""
+        lote = np.atleast_2d(lote)
+        B, n = lote.shape
+        if n == 0:
+            return np.zeros((B, 0), dtype=np.uint64)
+        # Um bloco que começa SOBREPOSICAO letras antes reproduz exatamente
+        # o estado para palavras de até max_len letras.
+        sobreposicao = max_len - 1
+        bloco = int(min(n, max(1, np.sqrt(B * n * max(sobreposicao, 1) / 256))))
+        n_blocos = -(-n // bloco)
+        estendido = np.full((B, sobreposicao + n_blocos * bloco), SENTINELA, dtype=np.intp)
+        estendido[:, sobreposicao:sobreposicao + n] = lote
+        janelas = sliding_window_view(estendido, bloco + sobreposicao, axis=1)[:, ::bloco]
+        colunas = np.ascontiguousarray(janelas.reshape(-1, bloco + sobreposicao).T)
+
+        estados = np.empty(colunas.shape, dtype=np.intp)
+        atual = np.zeros(colunas.shape[1], dtype=np.intp)
+        for j, coluna in enumerate(colunas):
+            atual = self.delta[atual * self.largura + coluna]
+            estados[j] = atual
+        mascaras = self.saida[estados[sobreposicao:]]
+        return mascaras.T.reshape(B, n_blocos * bloco)[:, :n]
+
+    def contar_prefixos(self, lote, min_len=1, max_len=12):
+        """Quantas palavras de min_len a max_len letras começam na 1ª coluna de cada linha."""
+        lote = np.atleast_2d(lote)
+        atual = np.zeros(lote.shape[0], dtype=np.intp)
+        contagem = np.zeros(lote.shape[0], dtype=np.int64)
+        for L in range(1, min(max_len, lote.shape[1]) + 1):
+            atual = self.delta[atual * self.largura + lote[:, L - 1]]
+            if L >= min_len:
+                # Só L letras lidas desde a raiz: a palavra de L letras começa na coluna 0
+                contagem += ((self.saida[atual] >> np.uint64(L)) & np.uint64(1)).astype(np.int64)
+        return contagem
+
+    def varrer(self, lote, min_len=1, max_len=12):
+        """Passa o autômato no lote (ou em um único texto codificado)."""
+        return Varredura(self.mascaras(lote, max_len), min_len, max_len)
+
+    def varrer_textos(self, textos, min_len=1, max_len=12):
+        """Atalho para uma lista de strings de mesmo tamanho."""
+        lote = codificar(''.join(textos)).reshape(len(textos), -1)
+        return self.varrer(lote, min_len, max_len)
+
+_automatos = {}
+
+def carregar_automato(modelo=None):
+    """Autômato do vocabulário do modelo (lido do arquivo; montado se ausente)."""
+    modelo = modelo or carregar_modelo()
+    if id(modelo) not in _automatos:
+        if modelo.tem_secao('ac_delta'):
+            delta, saida = modelo.secao('ac_delta'), modelo.secao('ac_saida')
+        else:
+            print("Modelo sem autômato de palavras; montando em memória...")
+            delta, saida = construir_automato(modelo.palavras)
+        _automatos[id(modelo)] = Automato(delta, saida)
+    return _automatos[id(modelo)]
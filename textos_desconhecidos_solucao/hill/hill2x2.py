@@ -1,7 +1,11 @@
 import numpy as np
 from math import gcd
 from collections import Counter
-from nltk.corpus import floresta
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modelo_linguagem import carregar_modelo, codificar, decodificar
+from dicionario import carregar_automato
 
 MOD = 26
 
@@ -18,30 +22,29 @@ def modinv(a):
             return i
     return None
 
-# --- Corpus Floresta para validação ---
-floresta_vocab = set(w.lower() for w in floresta.words() if w.isalpha())
+# --- Vocabulário do modelo de linguagem para validação ---
+automato = carregar_automato(carregar_modelo())
 
 def count_known_words(text, min_len=3):
-    total = 0
-    matches = 0
-    for i in range(len(text)):
-        for j in range(i + min_len, min(len(text) + 1, i + 12)):
-            if text[i:j] in floresta_vocab:
-                matches += 1
-                break
-        total += 1
-    return matches / total if total else 0
-
-# --- Função de inversão da matriz triangular superior ---
-def inv_triang_matrix(x, y, z):
-    inv_x = modinv(x)
-    inv_z = modinv(z)
-    if inv_x is None or inv_z is None:
-        return None
-    inv = np.array([
-        [inv_x % MOD, (-inv_x * y * inv_z) % MOD],
-        [0, inv_z % MOD]
-    ], dtype=int)
+    # Fração das posições em que começa alguma palavra de min_len a 11 letras
+    if not text:
+        return 0
+    return float((automato.varrer(codificar(text), min_len, 11).mais_longa[0] > 0).mean())
+
+def count_known_words_lote(lote, min_len=3):
+    """count_known_words para um lote (n_textos, n) de textos codificados."""
+    return (automato.varrer(lote, min_len, 11).mais_longa > 0).mean(axis=1)
+
+# Inverso multiplicativo de cada valor mod 26 (0 onde não existe)
+INVERSOS = np.array([modinv(a) or 0 for a in range(MOD)])
+
+def inversas_triang(xs, ys, zs):
+    """Inversas de todas as chaves [[x, y], [0, z]] de uma vez: shape (n, 2, 2)."""
+    inv_x, inv_z = INVERSOS[xs], INVERSOS[zs]
+    inv = np.zeros((len(xs), 2, 2), dtype=int)
+    inv[:, 0, 0] = inv_x
+    inv[:, 0, 1] = (-inv_x * ys * inv_z) % MOD
+    inv[:, 1, 1] = inv_z
     return inv
 
 # --- Função principal de ataque ---
@@ -50,34 +53,24 @@ def ataque_hill_triang(cipher_text):
     if len(nums) % 2 != 0:
         nums.append(0)  # padding se necessário
 
-    blocos = [nums[i:i+2] for i in range(0, len(nums), 2)]
+    blocos = np.array(nums).reshape(-1, 2)
 
     valid_vals = [i for i in range(1, 26) if gcd(i, 26) == 1]
-    resultados = []
+    x, y, z = (v.ravel() for v in np.meshgrid(valid_vals, range(MOD), valid_vals, indexing='ij'))
 
-    for x in valid_vals:
-        for y in range(26):
-            for z in valid_vals:
-                inv = inv_triang_matrix(x, y, z)
-                if inv is None:
-                    continue
+    # Todas as 12x26x12 inversas aplicadas a todos os blocos em um único einsum
+    inv = inversas_triang(x, y, z)
+    decifrados = (np.einsum('kij,bj->kbi', inv, blocos) % MOD).reshape(len(x), -1).astype(np.uint8)
 
-                decifrado_nums = []
-                for bloco in blocos:
-                    vec = np.array(bloco).reshape((2, 1))
-                    dec = np.dot(inv, vec) % MOD
-                    decifrado_nums.extend(dec.flatten().astype(int))
-
-                texto_decifrado = numbers_to_text(decifrado_nums)
-
-                # Avaliação por palavras
-                word_score = count_known_words(texto_decifrado)
-
-                resultados.append((x, y, z, texto_decifrado, word_score))
+    # Avaliação por palavras, em lote
+    word_scores = count_known_words_lote(decifrados)
 
     # Ordena pelos melhores word_score
-    resultados.sort(key=lambda x: -x[4])
-    return resultados
+    ordem = np.argsort(-word_scores, kind='stable')
+    return [
+        (int(x[i]), int(y[i]), int(z[i]), decodificar(decifrados[i]), float(word_scores[i]))
+        for i in ordem
+    ]
 
 if __name__ == "__main__":
     cipher_text = "dzvzkwwutatrkwhapdvqdeuqsadqacnnxegwwusaautahejeqlpvdfrldlbnuejefileheoqidkuacnnxekunfnagiyetvvgoqxdkubfkqqlausaddsilrdz"
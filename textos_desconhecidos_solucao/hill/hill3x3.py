@@ -1,30 +1,22 @@
 import numpy as np
-from sympy import Matrix
-from collections import Counter
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from tqdm import tqdm
-import nltk
-from nltk.corpus import floresta
-
-# Se ainda não baixou o corpus Floresta, descomente a linha abaixo:
-nltk.download('floresta')
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modelo_linguagem import carregar_modelo, codificar
+from dicionario import carregar_automato
+from texto import TextoCodificado
+import telemetria
+from algebra_mod26 import inversas_mod26
 
 MOD = 26
 
-# Frequências aproximadas de letras em português sem acento
-PORT_FREQ = {
-    'a': 0.1221, 'e': 0.1319, 'o': 0.1022, 's': 0.0735, 'r': 0.0673,
-    'i': 0.0618, 'n': 0.0470, 'm': 0.0430, 'u': 0.0393, 't': 0.0387,
-    'd': 0.0334, 'c': 0.0272, 'l': 0.0270, 'p': 0.0250, 'v': 0.0153,
-    'q': 0.0120, 'b': 0.0123, 'f': 0.0109, 'g': 0.0102, 'h': 0.0078,
-    'j': 0.0030, 'z': 0.0025, 'x': 0.0016, 'k': 0.0003, 'w': 0.0001,
-    'y': 0.0001
-}
-
-PORT_WORDS = set(w.lower() for w in floresta.words() if w.isalpha())
-# Conjunto de palavras comuns em português (pode expandir com dicionário melhor)
-#with open("floresta_words.txt", "r", encoding="utf-8") as f:
-#    PORT_WORDS = set(line.strip() for line in f if len(line.strip()) > 2)
+modelo = carregar_modelo()
+
+# Frequências de letras em português sem acento (do modelo de linguagem)
+PORT_FREQ = modelo.freq_dict()
+
+PORT_WORDS = modelo.palavras
+automato = carregar_automato(modelo)
 
 def text_to_numbers(text):
     return [ord(c) - ord('a') for c in text]
@@ -33,49 +25,30 @@ def numbers_to_text(nums):
     return ''.join(chr((n % MOD) + ord('a')) for n in nums)
 
 def modinv_matrix(mat):
-    try:
-        inv = Matrix(mat).inv_mod(MOD)
-        return np.array(inv).astype(int)
-    except:
-        return None
+    inv, invertivel = inversas_mod26(mat)
+    return inv if invertivel else None
 
 def chi_squared_score(text):
-    N = len(text)
-    if N == 0:
+    texto = TextoCodificado.de(text)
+    if len(texto) == 0:
         return float('inf')
-    cnt = Counter(text)
-    chi2 = 0.0
-    for letter, expected in PORT_FREQ.items():
-        observed = cnt.get(letter, 0)
-        exp_count = N * expected
-        if exp_count > 0:
-            chi2 += ((observed - exp_count)**2) / exp_count
-    return chi2
-
-def segmentar_texto(texto, dicionario, max_len=12):
-    i = 0
-    palavras = []
+    return float(chi_squared_lote(texto.contagem_letras()[None, :])[0])
+
+def chi_squared_lote(contagens):
+    """chi_squared_score de cada linha de um array (n, 26) de contagens de letras."""
+    esperado = contagens.sum(axis=1, keepdims=True) * modelo.freq_letras[modelo.freq_letras > 0]
+    desvio = contagens[:, modelo.freq_letras > 0] - esperado
+    return (desvio ** 2 / esperado).sum(axis=1)
+
+def segmentar_texto(texto, max_len=12):
+    # Segmentação gulosa pela maior palavra do vocabulário (PORT_WORDS)
     texto = texto.lower()
-    while i < len(texto):
-        for j in range(min(len(texto), i + max_len), i, -1):
-            palavra = texto[i:j]
-            if palavra in dicionario:
-                palavras.append(palavra)
-                i = j
-                break
-        else:
-            i += 1
-    return palavras
-
-def word_coverage_ratio(texto, dicionario, min_len=3, max_len=12):
-    tokens = segmentar_texto(texto, dicionario, max_len=max_len)
-    covered = [False]*len(texto)
-    for token in tokens:
-        start = texto.find(token)
-        if start >= 0:
-            for i in range(start, start+len(token)):
-                covered[i] = True
-    return sum(covered) / len(texto)
+    tokens = automato.varrer(codificar(texto), 1, max_len).segmentar()
+    return [texto[i:i + tamanho] for i, tamanho in tokens]
+
+def word_coverage_ratio(texto, min_len=3, max_len=12):
+    tokens = automato.varrer(TextoCodificado.de(texto).codigos, 1, max_len).segmentar()
+    return sum(tamanho for _, tamanho in tokens) / len(texto)
 
 def heuristica_rapida(texto):
     # Evita textos com excesso de letras repetidas consecutivas
@@ -98,141 +71,147 @@ def decrypt_blocks(blocks, key_inv):
     decrypted = (key_inv @ arr_blocks) % MOD
     return decrypted.T.flatten().astype(int)
 
+# As fases 1 e 2 só olham os histogramas do texto cifrado: a letra decifrada
+# de cada candidato é uma função da letra (ou do par de letras) cifrada, então
+# o histograma decifrado sai por remapeamento de índices, sem tocar nos blocos.
+UNIDADES = np.array(valid_invertibles())
+INVERSO = np.zeros(MOD, dtype=np.int64)
+INVERSO[UNIDADES] = [pow(int(u), -1, MOD) for u in UNIDADES]
+
+# Linha 2 de K^-1 = [0, inv_a, beta]: a letra l vem dos pares (c2, c3) com
+# inv_a * c2 + beta * c3 = l, ou seja c2 = a * (l - beta * c3).
+# Índice [a, beta, l, c3] -> par c2 * 26 + c3, fixo (não depende do texto nem de c).
+_L, _C3 = np.arange(MOD)[:, None], np.arange(MOD)[None, :]
+_PARES_FASE2 = ((UNIDADES[:, None, None, None] * (_L - np.arange(MOD)[:, None, None] * _C3)) % MOD * MOD + _C3).astype(np.intp)
+
+def histograma_pares(blocks):
+    """Contagens (26, 26) dos pares cifrados (c2, c3), posições 2 e 3 de cada bloco."""
+    blocos = np.asarray(blocks)
+    return np.bincount(blocos[:, 1] * MOD + blocos[:, 2], minlength=MOD * MOD).reshape(MOD, MOD)
+
+def histogramas_linha2(pares):
+    """Histograma decifrado (12, 26, 26) de cada linha [0, inv_a, beta], para todo a e beta."""
+    return pares.ravel().take(_PARES_FASE2).sum(axis=3)
+
 # --- Fase 1: Encontrar candidatos para c (último valor diagonal) ---
-def encontrar_candidatos_c(blocks, top_n=10):
-    candidatos = []
-    invs = valid_invertibles()
-    for c in invs:
-        inv_c = pow(c, -1, MOD)
-        # extrair o terceiro elemento do bloco e aplicar inv_c
-        p3 = [(inv_c * block[2]) % MOD for block in blocks]
-        texto_p3 = numbers_to_text(p3)
-        score_c = chi_squared_score(texto_p3)
-        candidatos.append((c, score_c))
-    candidatos.sort(key=lambda x: x[1])
-    return candidatos[:top_n]
+def encontrar_candidatos_c(blocks, top_n=10, pares=None):
+    pares = histograma_pares(blocks) if pares is None else pares
+    # p3 = inv_c * c3: multiplicar por uma unidade só permuta as letras
+    contagens = np.zeros((len(UNIDADES), MOD), dtype=np.int64)
+    contagens[np.arange(len(UNIDADES))[:, None], (INVERSO[UNIDADES][:, None] * np.arange(MOD)) % MOD] = pares.sum(axis=0)
+    scores = chi_squared_lote(contagens)
+    telemetria.contar(len(UNIDADES))
+    ordem = np.argsort(scores, kind='stable')[:top_n]
+    return [(int(UNIDADES[i]), float(scores[i])) for i in ordem]
 
 # --- Fase 2: Para cada c, encontrar candidatos para a,b (linha 2) ---
-def encontrar_candidatos_ab(blocks, c, top_n=20):
-    candidatos = []
-    invs = valid_invertibles()
-    inv_c = pow(c, -1, MOD)
-    for a in invs:
-        inv_a = pow(a, -1, MOD)
-        for b in range(MOD):
-            # Segunda linha de K^{-1} é: [0, 1/a, -b/(a*c)]
-            # Em mod 26: [0, inv_a, (-b * inv_a * inv_c) mod 26]
-            inv_b = (-b * inv_a * inv_c) % MOD
-            # Calcular p2 para todos os blocos
-            p2 = []
-            for block in blocks:
-                val = (inv_a * block[1] + inv_b * block[2]) % MOD
-                p2.append(val)
-            texto_p2 = numbers_to_text(p2)
-            score_ab = chi_squared_score(texto_p2)
-            candidatos.append((a, b, score_ab))
-    candidatos.sort(key=lambda x: x[2])
-    return candidatos[:top_n]
-
-# --- Fase 3: Para cada (a,b,c), encontrar candidatos para primeira linha (x,y,z) ---
-
+def encontrar_candidatos_ab(blocks, c, top_n=20, histogramas=None):
+    histogramas = histogramas_linha2(histograma_pares(blocks)) if histogramas is None else histogramas
+    # Segunda linha de K^{-1} é: [0, 1/a, -b/(a*c)]
+    # Em mod 26: [0, inv_a, (-b * inv_a * inv_c) mod 26]
+    # Todas as (a, b) na ordem do laço original: a invertível, b livre
+    beta = (-np.arange(MOD)[None, :] * INVERSO[UNIDADES][:, None] * INVERSO[c]) % MOD
+    contagens = histogramas[np.arange(len(UNIDADES))[:, None], beta].reshape(-1, MOD)
+    scores = chi_squared_lote(contagens)
+    telemetria.contar(len(scores))
+    ordem = np.argsort(scores, kind='stable')[:top_n]
+    return [(int(UNIDADES[i // MOD]), int(i % MOD), float(scores[i])) for i in ordem]
+
+# --- Pontuação pelo dicionário (usada na conferência da fase 3) ---
 def count_known_words(text, min_len=3):
-    total = 0
-    matches = 0
-    for i in range(len(text)):
-        for j in range(i + min_len, min(len(text) + 1, i + 12)):
-            if text[i:j] in PORT_WORDS:
-                matches += 1
-                break
-        total += 1
-    return matches / total if total else 0
-
-def avaliar_klinha(args):
-    a, b, c, score_ab_c, x, y, z, linha2, linha3, blocks = args
-    key = np.array([
-        [x, y, z],
-        [0, a, b],
-        [0, 0, c]
-    ])
-    # Matriz inversa real conhecida (K⁻¹)
-    K_REAL_INV = np.array([
-        [7, 19, 14],
-        [0, 21, 11],
-        [0,  0,  9]
-    ])
-    key_inv = modinv_matrix(key)
-
-    if key_inv is None:
-        print("Chave inválida")
-        return None
-    try:
-        plain_nums = decrypt_blocks(blocks, key_inv)
-        plaintext = numbers_to_text(plain_nums)
-        CHAVE_REAL = np.array([
-            [15, 25, 5],
-            [ 0, 25, 11],
-            [ 0,  0,  3]
-        ])
-        chi2 = chi_squared_score(plaintext)
-        word_cov_score = word_coverage_ratio(plaintext, PORT_WORDS)        
-        score = count_known_words(plaintext)
-        return (plaintext, chi2, score, key_inv.tolist(), key)
-    except Exception as e:
-        print("Erro ao avaliar klinha: ", e)
-        return None
+    # Fração das posições em que começa alguma palavra de min_len a 11 letras
+    if not text:
+        return 0
+    return float((automato.varrer(TextoCodificado.de(text).codigos, min_len, 11).mais_longa[0] > 0).mean())
+
+def count_known_words_lote(lote, min_len=3):
+    """count_known_words para um lote (n_textos, n) de textos codificados."""
+    return (automato.varrer(lote, min_len, 11).mais_longa > 0).mean(axis=1)
 
 def normalize(val, min_val, max_val):
     if max_val == min_val:
         return 0.0  # evita divisão por zero
     return (val - min_val) / (max_val - min_val)
 
+# --- Fase 3: primeira linha de K^-1, pontuada sozinha e depois juntada a (a, b, c) ---
+# A posição 1 de cada bloco decifrado só depende da primeira linha [u, v, w]
+# de K^-1 (u invertível, v e w livres: 12*26*26 linhas), não de (a, b, c).
+# Isso substitui o pool de processos (inicializador, memória compartilhada,
+# top-k por processo) que percorria o produto 3744 x 200 de (x, y, z) com (a, b, c).
+LINHAS_INV = np.array([(u, v, w) for u in valid_invertibles() for v in range(MOD) for w in range(MOD)])
+# Letras decifradas por lote na conferência final
+LETRAS_POR_LOTE = 4_000_000
+
+def candidatos_primeira_linha(blocks, top_n=20):
+    """Melhores primeiras linhas de K^-1 pelas letras da posição 1: (linhas (top_n, 3), scores)."""
+    blocos = np.asarray(blocks, dtype=np.int64)
+    scores = modelo.log1[(LINHAS_INV @ blocos.T) % MOD].sum(axis=1, dtype=np.float64)
+    telemetria.contar(len(LINHAS_INV))
+    ordem = np.argsort(-scores, kind='stable')[:top_n]
+    return LINHAS_INV[ordem], scores[ordem]
+
+def inversas_linhas23(candidatos_ab_c):
+    """Linhas 2 e 3 de K^-1, [0, 1/a, -b/(a*c)] e [0, 0, 1/c], de cada (a, b, c): shape (n, 2, 3)."""
+    a, b, c = (np.array([cand[i] for cand in candidatos_ab_c], dtype=np.int64) for i in range(3))
+    linhas = np.zeros((len(a), 2, 3), dtype=np.int64)
+    linhas[:, 0, 1] = INVERSO[a]
+    linhas[:, 0, 2] = (-b * INVERSO[a] * INVERSO[c]) % MOD
+    linhas[:, 1, 2] = INVERSO[c]
+    return linhas
+
+def _juntar_linhas(linhas1, linhas23):
+    """K^-1 (n, 3, 3) a partir das primeiras linhas (n, 3) e das linhas 2 e 3 (n, 2, 3)."""
+    return np.concatenate([linhas1[:, None, :], linhas23], axis=1)
+
+def _gerar_lotes(linhas1, linhas23, por_lote):
+    """Combinações (linha 1, linhas 2 e 3) em lotes de cerca de por_lote K^-1, montados sob demanda.
+
+    A linha 1 varia mais rápido; cada lote cobre (a, b, c) inteiros, nunca
+    o produto inteiro de uma vez.
+    """
+    por_candidato = max(1, por_lote // len(linhas1))
+    for inicio in range(0, len(linhas23), por_candidato):
+        grupo = linhas23[inicio:inicio + por_candidato]
+        yield _juntar_linhas(np.tile(linhas1, (len(grupo), 1)), np.repeat(grupo, len(linhas1), axis=0))
+
 resultados_tpl1 = []
-resultados_tpl2 = []
-def testar_primeira_linha(candidatos_ab_c, blocks, top_n=5):
+def testar_primeira_linha(candidatos_ab_c, blocks, top_n=5, max_linhas=20):
+    """Junta as max_linhas melhores primeiras linhas com cada (a, b, c) e ordena pelo dicionário."""
     global resultados_tpl1
-    resultados = []
-    invs = valid_invertibles()
-    tarefas = []
-
-    print("[*] Preparando tarefas para paralelismo...")
-    for (a, b, c, score_ab_c) in candidatos_ab_c:
-        # Validar que a e c são invertíveis no mod 26
-        if np.gcd(a, MOD) != 1 or np.gcd(c, MOD) != 1:
-            continue
-        try:
-            inv_c = pow(c, -1, MOD)
-            inv_a = pow(a, -1, MOD)
-        except ValueError:
-            continue  # pula se não tiver inverso
-
-        # Construir segunda e terceira linha da inversa de K
-        # Fórmula correta para triangular superior
-        # linha2 = [0, 1/a, -b / (a * c)]
-        linha2 = [0, inv_a % MOD, (-b * inv_a * inv_c) % MOD]
-        linha3 = [0, 0, inv_c % MOD]
-
-        # Gerar todas as combinações possíveis para a primeira linha (x, y, z)
-        for x in invs:
-            for y in range(MOD):
-                for z in invs:
-                      tarefas.append((a, b, c, score_ab_c, x, y, z, linha2, linha3, blocks))
-
-    print(f"[*] Total de combinações a testar: {len(tarefas)}")
-    with ProcessPoolExecutor() as executor:
-        all_results = list(tqdm(
-            executor.map(avaliar_klinha, tarefas),
-            total=len(tarefas),
-            desc="Testando primeira linha"
-        ))
-
+    # a e c precisam ser invertíveis no mod 26
+    candidatos_ab_c = [cand for cand in candidatos_ab_c if np.gcd(cand[0], MOD) == 1 and np.gcd(cand[2], MOD) == 1]
+    if not candidatos_ab_c:
+        return []
+    blocos = np.asarray(blocks, dtype=np.int64)
+    linhas1, _ = candidatos_primeira_linha(blocos, max_linhas)
+    linhas23 = inversas_linhas23(candidatos_ab_c)
+
+    total = len(linhas1) * len(linhas23)
+    print(f"[*] Total de combinações a testar: {total} ({len(linhas1)} primeiras linhas x {len(linhas23)} (a, b, c))")
+
+    # Índice i da combinação: linha 1 = i % len(linhas1), (a, b, c) = i // len(linhas1)
+    scores = np.empty(total)
+    inicio = 0
+    for key_inv in _gerar_lotes(linhas1, linhas23, max(1, LETRAS_POR_LOTE // blocos.size)):
+        plano = (np.einsum('kij,bj->kbi', key_inv, blocos) % MOD).reshape(-1, blocos.size)
+        scores[inicio:inicio + len(plano)] = count_known_words_lote(plano.astype(np.uint8))
+        inicio += len(plano)
+        telemetria.contar(len(plano))
+
+    all_results = []
+    melhores = np.argsort(-scores, kind='stable')[:top_n]
+    key_inv = _juntar_linhas(linhas1[melhores % len(linhas1)], linhas23[melhores // len(linhas1)])
+    # Triangular com diagonal invertível: a inversa sempre existe
+    keys, _ = inversas_mod26(key_inv)
+    for i, inv, key in zip(melhores, key_inv, keys):
+        plaintext = numbers_to_text(decrypt_blocks(blocos, inv))
+        all_results.append((plaintext, chi_squared_score(plaintext), float(scores[i]), inv.tolist(), key))
+    if all_results:
+        telemetria.melhor(all_results[0][2], all_results[0][0])
     print(f"[*] Resultados recebidos: {len(all_results)}")
     resultados_tpl1 = all_results
 
-    # Filtrar e ordenar os resultados válidos
-    resultados_validos = [r for r in all_results if r is not None]
-    resultados_validos.sort(key=lambda x: -x[2])  # ordenar por word score (x[2]) decrescente
-
-    return resultados_validos[:top_n]
+    return all_results
 
 
 # Função principal orquestradora
@@ -244,20 +223,27 @@ def ataque_hill_otimizado(ciphertext, max_c=10, max_ab=20, top_k=10):
     nums = text_to_numbers(ciphertext)
     blocks = gerar_blocos(nums)
 
+    pares = histograma_pares(blocks)
+    histogramas = histogramas_linha2(pares)
+
     print("[+] Encontrando candidatos para c...")
-    candidatos_c = encontrar_candidatos_c(blocks, top_n=max_c)
+    with telemetria.fase('c'):
+        candidatos_c = encontrar_candidatos_c(blocks, top_n=max_c, pares=pares)
     print(f"    Encontrados {len(candidatos_c)} candidatos para c.")
     candidatos_ab_c = []
-    for c, score_c in tqdm(candidatos_c, desc="[*] Avaliando candidatos (a,b) para cada c"):
-        ab_candidates = encontrar_candidatos_ab(blocks, c, top_n=max_ab)
-        for (a, b, score_ab) in ab_candidates:
-            combined_score = score_c + score_ab
-            candidatos_ab_c.append((a, b, c, combined_score))
+    print("[*] Avaliando candidatos (a,b) para cada c")
+    with telemetria.fase('ab'):
+        for c, score_c in candidatos_c:
+            ab_candidates = encontrar_candidatos_ab(blocks, c, top_n=max_ab, histogramas=histogramas)
+            for (a, b, score_ab) in ab_candidates:
+                combined_score = score_c + score_ab
+                candidatos_ab_c.append((a, b, c, combined_score))
     candidatos_ab_c.sort(key=lambda x: x[3])
     candidatos_ab_c = candidatos_ab_c[:max_c*max_ab]
 
     print(f"\n[+] Testando primeira linha (x,y,z) para {len(candidatos_ab_c)} candidatos...")
-    resultados = testar_primeira_linha(candidatos_ab_c, blocks, top_n=top_k)
+    with telemetria.fase('primeira_linha'):
+        resultados = testar_primeira_linha(candidatos_ab_c, blocks, top_n=top_k)
     resultados_finais = resultados
     print("[+] Resultados obtidos:")
     for idx, (text, chi2, wscore, key_inv, key) in enumerate(resultados):
@@ -267,17 +253,13 @@ def ataque_hill_otimizado(ciphertext, max_c=10, max_ab=20, top_k=10):
     return resultados
 
 def testar_chave_hardcoded(ciphertext, chave):
-    from sympy import Matrix
-
     print("[+] Convertendo texto para números...")
     nums = text_to_numbers(ciphertext)
     blocks = gerar_blocos(nums)
 
     print("[+] Tentando inverter chave fornecida...")
-    try:
-        inv_key = Matrix(chave).inv_mod(MOD)
-        inv_key_np = np.array(inv_key).astype(int)
-    except:
+    inv_key_np = modinv_matrix(chave)
+    if inv_key_np is None:
         print("Erro: chave não invertível no módulo 26.")
         return
 
@@ -291,7 +273,7 @@ def testar_chave_hardcoded(ciphertext, chave):
         return
 
     chi2 = chi_squared_score(plaintext)
-    word_cov_score = word_coverage_ratio(plaintext, PORT_WORDS)
+    word_cov_score = word_coverage_ratio(plaintext)
     chi2_vals = [r[1] for r in resultados_tpl1]
     wscore_vals = [r[2] for r in resultados_tpl1]
 
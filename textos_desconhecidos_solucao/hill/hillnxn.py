@@ -0,0 +1,137 @@
+"""Ataque só com texto cifrado a chaves de Hill NxN cheias (não triangulares).
+
+Cada linha de K^-1 decifra sozinha uma posição de cada bloco: p_i = <linha_i, bloco>.
+Então as 26^n linhas possíveis são enumeradas em lote e pontuadas pelas
+frequências de letras da coluna que produzem, e só as melhores seguem.
+A chave é montada posição a posição por busca em feixe, ligando as linhas
+pelos bigramas entre posições vizinhas do bloco (e entre o fim de um bloco
+e o começo do seguinte); no fim ficam só as combinações invertíveis.
+"""
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modelo_linguagem import carregar_modelo, decodificar
+from pontuacao import pontuar_ngramas
+from dicionario import carregar_automato
+from texto import TextoCodificado
+import telemetria
+from algebra_mod26 import inversas_mod26
+
+MOD = 26
+
+modelo = carregar_modelo()
+automato = carregar_automato(modelo)
+
+# Linhas enumeradas por vez (limita a memória de R @ C.T)
+LINHAS_POR_LOTE = 1 << 16
+
+def gerar_blocos(cipher_text, n):
+    """Blocos (n_blocos, n) do texto codificado, com padding 'a' no último bloco."""
+    return TextoCodificado.de(cipher_text).blocos(n).astype(np.int64)
+
+def enumerar_linhas(inicio, fim, n):
+    """Linhas de índice inicio..fim-1 na ordem lexicográfica de Z_26^n."""
+    idx = np.arange(inicio, fim, dtype=np.int64)
+    return (idx[:, None] // MOD ** np.arange(n - 1, -1, -1)) % MOD
+
+def linhas_candidatas(blocos, top=200):
+    """Melhores linhas de K^-1 pela verossimilhança de letras da coluna decifrada.
+
+    Linhas todas pares ou todas múltiplas de 13 não aparecem em matriz
+    invertível e são descartadas. Devolve (linhas, colunas decifradas, scores).
+    """
+    n = blocos.shape[1]
+    total = MOD ** n
+    melhores_linhas = np.zeros((0, n), dtype=np.int64)
+    melhores_scores = np.zeros(0)
+    for inicio in range(0, total, LINHAS_POR_LOTE):
+        R = enumerar_linhas(inicio, min(inicio + LINHAS_POR_LOTE, total), n)
+        validas = (R % 2).any(axis=1) & (R % 13).any(axis=1)
+        R = R[validas]
+        telemetria.contar(len(R))
+        scores = modelo.log1[(R @ blocos.T) % MOD].sum(axis=1, dtype=np.float64)
+        R = np.concatenate([melhores_linhas, R])
+        scores = np.concatenate([melhores_scores, scores])
+        if len(scores) > top:
+            manter = np.argpartition(-scores, top)[:top]
+            R, scores = R[manter], scores[manter]
+        melhores_linhas, melhores_scores = R, scores
+    ordem = np.argsort(-melhores_scores, kind='stable')
+    linhas = melhores_linhas[ordem]
+    return linhas, (linhas @ blocos.T) % MOD, melhores_scores[ordem]
+
+def montar_chaves(linhas, colunas, scores, largura_feixe=2000):
+    """Busca em feixe pelas sequências de n linhas distintas (uma por posição do bloco).
+
+    O score de uma sequência soma o score de letras de cada linha e os
+    bigramas entre posições vizinhas; devolve as matrizes K^-1 invertíveis
+    e as chaves K correspondentes.
+    """
+    n = linhas.shape[1]
+    log2 = modelo.log2
+    # liga[u, v]: bigramas da linha u seguida da linha v no mesmo bloco;
+    # volta[u, v]: da última posição de um bloco para a primeira do próximo
+    liga = log2[colunas[:, None, :], colunas[None, :, :]].sum(axis=2, dtype=np.float64)
+    volta = log2[colunas[:, None, :-1], colunas[None, :, 1:]].sum(axis=2, dtype=np.float64)
+
+    M = len(linhas)
+    feixe = np.arange(M)[:, None]
+    feixe_scores = scores.astype(np.float64)
+    for _ in range(1, n):
+        expandido = feixe_scores[:, None] + scores[None, :] + liga[feixe[:, -1]]
+        # Cada linha entra uma única vez na chave
+        usadas = np.zeros((len(feixe), M), dtype=bool)
+        np.put_along_axis(usadas, feixe, True, axis=1)
+        expandido[usadas] = -np.inf
+        achatado = expandido.ravel()
+        k = min(largura_feixe, np.isfinite(achatado).sum())
+        escolhidos = np.argpartition(-achatado, k - 1)[:k]
+        origem, nova = np.divmod(escolhidos, M)
+        feixe = np.concatenate([feixe[origem], nova[:, None]], axis=1)
+        feixe_scores = achatado[escolhidos]
+    feixe_scores = feixe_scores + volta[feixe[:, -1], feixe[:, 0]]
+
+    matrizes = linhas[feixe]
+    chaves, invertiveis = inversas_mod26(matrizes)
+    ordem = np.argsort(-feixe_scores[invertiveis], kind='stable')
+    return matrizes[invertiveis][ordem], chaves[invertiveis][ordem]
+
+def ataque_hill_nxn(cipher_text, n, top_linhas=200, largura_feixe=2000, top_k=10):
+    """Devolve as top_k melhores (texto, score n-gramas, palavras, K^-1, K)."""
+    blocos = gerar_blocos(cipher_text, n)
+    with telemetria.fase('linhas'):
+        linhas, colunas, scores = linhas_candidatas(blocos, top_linhas)
+    with telemetria.fase('feixe'):
+        inversas, chaves = montar_chaves(linhas, colunas, scores, largura_feixe)
+    return conferir_chaves(blocos, len(cipher_text), inversas, chaves, top_k)
+
+def conferir_chaves(blocos, tamanho, inversas, chaves, top_k=10):
+    """Decifra o texto inteiro com cada K^-1, em lote, e devolve as top_k pelo score de n-gramas."""
+    if len(inversas) == 0:
+        return []
+    with telemetria.fase('conferencia'):
+        planos = (np.einsum('kij,bj->kbi', inversas, blocos) % MOD).reshape(len(inversas), -1)
+        planos = planos[:, :tamanho].astype(np.uint8)
+        scores_ng = pontuar_ngramas(planos, modelo=modelo)
+        palavras = (automato.varrer(planos, 3, 11).mais_longa > 0).mean(axis=1)
+        ordem = np.argsort(-scores_ng, kind='stable')[:top_k]
+    telemetria.contar(len(planos))
+    telemetria.melhor(scores_ng[ordem[0]], lambda: decodificar(planos[ordem[0]]))
+    return [
+        (decodificar(planos[i]), float(scores_ng[i]), float(palavras[i]),
+         inversas[i].tolist(), chaves[i])
+        for i in ordem
+    ]
+
+if __name__ == "__main__":
+    cipher_text = "textocifrado"
+    n = 4
+
+    resultados = ataque_hill_nxn(cipher_text, n)
+
+    for texto, score, palavras, key_inv, key in resultados:
+        print(f"Score={score:.2f}, Words={palavras:.2f}")
+        print(f"Chave:\n{key}")
+        print(texto)
+        print('-' * 60)
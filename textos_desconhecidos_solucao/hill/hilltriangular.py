@@ -0,0 +1,115 @@
+"""Ataque só com texto cifrado a chaves de Hill NxN triangulares superiores.
+
+As chaves do GeraEP1 são triangulares superiores com diagonal invertível, e
+K^-1 também é. A posição i de cada bloco decifrado só depende da linha i de
+K^-1, que tem zeros antes da diagonal: a última linha tem só 12 opções e a
+linha i tem 12 * 26^(n-1-i). O ataque resolve a última linha primeiro e sobe
+uma linha por estágio: as opções da linha são enumeradas em lote e
+pontuadas pelas letras da coluna que decifram, e as melhores são ligadas às
+chaves parciais do feixe pelos bigramas com a posição de baixo (a seguinte
+no bloco). O custo de um estágio cresce com 26^(n-1-i) e com a largura do
+feixe, não com o espaço inteiro de chaves triangulares.
+"""
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modelo_linguagem import carregar_modelo
+import telemetria
+from algebra_mod26 import inversas_mod26
+from hillnxn import LINHAS_POR_LOTE, MOD, conferir_chaves, gerar_blocos
+
+modelo = carregar_modelo()
+
+# Valores possíveis da diagonal (invertíveis mod 26)
+UNIDADES = np.array([u for u in range(1, MOD) if np.gcd(u, MOD) == 1])
+
+def enumerar_sufixos(inicio, fim, m):
+    """Sufixos [u, y_1, ..., y_m-1] de índice inicio..fim-1: u invertível, y livres."""
+    idx = np.arange(inicio, fim, dtype=np.int64)
+    livres = (idx[:, None] // MOD ** np.arange(m - 2, -1, -1)) % MOD
+    return np.concatenate([UNIDADES[idx // MOD ** (m - 1)][:, None], livres], axis=1)
+
+def linhas_candidatas(blocos, i, top=200):
+    """Melhores linhas i de K^-1 (zeros antes da diagonal) pelas letras da coluna i decifrada.
+
+    Devolve (linhas (top, n), colunas decifradas (top, n_blocos), scores).
+    """
+    n = blocos.shape[1]
+    m = n - i
+    total = len(UNIDADES) * MOD ** (m - 1)
+    sufixo_blocos = blocos[:, i:].T
+    melhores = np.zeros((0, m), dtype=np.int64)
+    melhores_scores = np.zeros(0)
+    for inicio in range(0, total, LINHAS_POR_LOTE):
+        S = enumerar_sufixos(inicio, min(inicio + LINHAS_POR_LOTE, total), m)
+        telemetria.contar(len(S))
+        scores = modelo.log1[(S @ sufixo_blocos) % MOD].sum(axis=1, dtype=np.float64)
+        S = np.concatenate([melhores, S])
+        scores = np.concatenate([melhores_scores, scores])
+        if len(scores) > top:
+            manter = np.argpartition(-scores, top)[:top]
+            S, scores = S[manter], scores[manter]
+        melhores, melhores_scores = S, scores
+    ordem = np.argsort(-melhores_scores, kind='stable')
+    linhas = np.zeros((len(ordem), n), dtype=np.int64)
+    linhas[:, i:] = melhores[ordem]
+    return linhas, (linhas @ blocos.T) % MOD, melhores_scores[ordem]
+
+def bigramas_entre(colunas_a, colunas_b):
+    """B[u, v]: soma dos log-bigramas (colunas_a[u][t], colunas_b[v][t]) sobre t.
+
+    Feito como um produto de matrizes (log2 das linhas de a contra o one-hot
+    de b), sem materializar o array (len(a), len(b), n_blocos).
+    """
+    linhas_log = modelo.log2[colunas_a].reshape(len(colunas_a), -1)
+    one_hot = np.eye(MOD)[colunas_b].reshape(len(colunas_b), -1)
+    return linhas_log @ one_hot.T
+
+def montar_feixe(blocos, top_linhas=200, largura_feixe=2000):
+    """Estágios de baixo para cima; devolve as K^-1 do feixe final, da melhor para a pior."""
+    n = blocos.shape[1]
+    with telemetria.fase(f'linha_{n - 1}'):
+        linhas, colunas, scores = linhas_candidatas(blocos, n - 1, top_linhas)
+    # niveis[j]: candidatas da linha j; feixe[:, j]: qual candidata da linha j cada chave usa
+    niveis = {n - 1: (linhas, colunas)}
+    feixe = np.arange(len(linhas))[:, None]
+    feixe_scores = scores
+    for i in range(n - 2, -1, -1):
+        with telemetria.fase(f'linha_{i}'):
+            linhas, colunas, scores = linhas_candidatas(blocos, i, top_linhas)
+            # Bigrama da posição i para a i+1 no mesmo bloco
+            liga = bigramas_entre(colunas, niveis[i + 1][1])
+            expandido = scores[:, None] + feixe_scores[None, :] + liga[:, feixe[:, 0]]
+            achatado = expandido.ravel()
+            k = min(largura_feixe, len(achatado))
+            escolhidos = np.argpartition(-achatado, k - 1)[:k]
+            nova, origem = np.divmod(escolhidos, len(feixe))
+            feixe = np.concatenate([nova[:, None], feixe[origem]], axis=1)
+            feixe_scores = achatado[escolhidos]
+            niveis[i] = (linhas, colunas)
+    # Da última posição de um bloco para a primeira do seguinte
+    volta = bigramas_entre(niveis[n - 1][1][:, :-1], niveis[0][1][:, 1:])
+    feixe_scores = feixe_scores + volta[feixe[:, -1], feixe[:, 0]]
+    ordem = np.argsort(-feixe_scores, kind='stable')
+    return np.stack([niveis[j][0][feixe[ordem, j]] for j in range(n)], axis=1)
+
+def ataque_hill_triangular(cipher_text, n, top_linhas=200, largura_feixe=2000, top_k=10):
+    """Devolve as top_k melhores (texto, score n-gramas, palavras, K^-1, K)."""
+    blocos = gerar_blocos(cipher_text, n)
+    inversas = montar_feixe(blocos, top_linhas, largura_feixe)
+    # Triangular com diagonal invertível: sempre invertível
+    chaves, _ = inversas_mod26(inversas)
+    return conferir_chaves(blocos, len(cipher_text), inversas, chaves, top_k)
+
+if __name__ == "__main__":
+    cipher_text = "textocifrado"
+    n = 4
+
+    resultados = ataque_hill_triangular(cipher_text, n)
+
+    for texto, score, palavras, key_inv, key in resultados:
+        print(f"Score={score:.2f}, Words={palavras:.2f}")
+        print(f"Chave:\n{key}")
+        print(texto)
+        print('-' * 60)
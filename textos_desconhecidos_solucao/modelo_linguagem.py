@@ -0,0 +1,279 @@
+"""Modelo de linguagem do português compilado em um único arquivo binário.
+
+O corpus (Floresta, ou um diretório de .txt com
+``python modelo_linguagem.py <diretorio>``) é processado uma única vez e as
+tabelas densas de log-probabilidade de monogramas a quadrigramas, as
+frequências de letras, o vocabulário e o autômato de palavras (ver
+``dicionario.py``) são gravados em ``modelo_pt.bin``.
+Os ataques carregam esse arquivo por memory map com ``carregar_modelo()``.
+
+Formato do arquivo:
+    MAGIA (8 bytes) | tamanho do cabeçalho (uint32) | cabeçalho JSON |
+    seções alinhadas em ALINHAMENTO bytes (dtype/shape/offset no cabeçalho)
+"""
+import json
+import os
+import re
+import struct
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ALFABETO = 'abcdefghijklmnopqrstuvwxyz'
+MOD = 26
+ORDEM_MAXIMA = 4
+
+MAGIA = b'SEGINLM1'
+ALINHAMENTO = 64
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modelo_pt.bin')
+
+# ============================================
+# ======== Normalização e contagem ===========
+# ============================================
+
+def remover_acentos(txt):
+    return ''.join(c for c in unicodedata.normalize('NFD', txt)
+                   if unicodedata.category(c) != 'Mn')
+
+def normalizar_palavra(palavra):
+    """Minúsculas, sem acentos; devolve '' se sobrar algo fora de a-z."""
+    palavra = remover_acentos(palavra.lower())
+    if palavra.isascii() and palavra.isalpha():
+        return palavra
+    return ''
+
+def codificar(texto):
+    """Converte texto a-z em array uint8 (a=0, ..., z=25)."""
+    return (np.frombuffer(texto.encode('ascii'), dtype=np.uint8) - ord('a')).astype(np.uint8)
+
+def decodificar(codigos):
+    """Converte array de códigos 0..25 de volta em texto."""
+    return (np.asarray(codigos, dtype=np.uint8) + ord('a')).tobytes().decode('ascii')
+
+def indices_ngramas(codigos, ordem):
+    """Índice linear (base 26) de cada n-grama de ``codigos`` ao longo do último eixo."""
+    codigos = np.asarray(codigos)
+    n = codigos.shape[-1] - ordem + 1
+    if n <= 0:
+        return np.zeros(codigos.shape[:-1] + (0,), dtype=np.intp)
+    idx = codigos[..., :n].astype(np.intp)
+    for d in range(1, ordem):
+        idx = idx * MOD + codigos[..., d:d + n]
+    return idx
+
+def contar_ngramas(codigos, ordem):
+    """Contagens densas (26**ordem) dos n-gramas de um texto codificado."""
+    return np.bincount(indices_ngramas(codigos, ordem), minlength=MOD ** ordem).astype(np.int64)
+
+def log_probabilidades(contagens):
+    """Log-probabilidades com suavização de Laplace."""
+    contagens = np.asarray(contagens, dtype=np.float64)
+    return np.log((contagens + 1) / (contagens.sum() + contagens.size))
+
+# ============================================
+# ========= Escrita e leitura ================
+# ============================================
+
+def _alinhar(n):
+    return (n + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+def salvar_secoes(secoes, caminho):
+    """Grava um dicionário nome -> array no formato do modelo."""
+    secoes = {nome: np.ascontiguousarray(arr) for nome, arr in secoes.items()}
+    # O offset das seções depende do tamanho do cabeçalho, então calcula-se
+    # o cabeçalho até que ele pare de crescer.
+    inicio_dados = 0
+    while True:
+        cabecalho, offset = {}, inicio_dados
+        for nome, arr in secoes.items():
+            cabecalho[nome] = {'dtype': arr.dtype.str, 'shape': list(arr.shape), 'offset': offset}
+            offset = _alinhar(offset + arr.nbytes)
+        bruto = json.dumps(cabecalho).encode('utf-8')
+        necessario = _alinhar(len(MAGIA) + 4 + len(bruto))
+        if necessario <= inicio_dados:
+            break
+        inicio_dados = necessario
+
+    tmp = caminho + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIA + struct.pack('<I', len(bruto)) + bruto)
+        for nome, arr in secoes.items():
+            f.seek(cabecalho[nome]['offset'])
+            f.write(arr.tobytes())
+        f.truncate(max(offset, inicio_dados))
+    os.replace(tmp, caminho)
+
+def ler_secoes(caminho):
+    """Abre as seções do arquivo como memory maps somente leitura."""
+    with open(caminho, 'rb') as f:
+        if f.read(len(MAGIA)) != MAGIA:
+            raise ValueError(f"{caminho} não é um modelo de linguagem válido")
+        (tamanho,) = struct.unpack('<I', f.read(4))
+        cabecalho = json.loads(f.read(tamanho))
+    return {
+        nome: np.memmap(caminho, dtype=np.dtype(info['dtype']), mode='r',
+                        offset=info['offset'], shape=tuple(info['shape']))
+        for nome, info in cabecalho.items()
+    }
+
+def salvar_modelo(contagens, palavras, caminho=CAMINHO_PADRAO):
+    """Grava o modelo a partir das contagens de ordem 1..ORDEM_MAXIMA e do vocabulário."""
+    secoes = {'freq_letras': (contagens[0] / max(contagens[0].sum(), 1)).astype(np.float64)}
+    for ordem, cont in enumerate(contagens, start=1):
+        secoes[f'log{ordem}'] = log_probabilidades(cont).astype(np.float32).reshape((MOD,) * ordem)
+    vocab = sorted(set(palavras))
+    secoes['palavras'] = np.frombuffer('\n'.join(vocab).encode('ascii'), dtype=np.uint8)
+    from dicionario import construir_automato
+    secoes['ac_delta'], secoes['ac_saida'] = construir_automato(vocab)
+    salvar_secoes(secoes, caminho)
+
+def palavras_floresta():
+    import nltk
+    try:
+        nltk.data.find('corpora/floresta')
+    except LookupError:
+        nltk.download('floresta')
+    from nltk.corpus import floresta
+    return floresta.words()
+
+def construir_modelo(palavras=None, caminho=CAMINHO_PADRAO):
+    """Conta n-gramas do corpus (Floresta por padrão) e grava o modelo."""
+    if palavras is None:
+        palavras = palavras_floresta()
+    normalizadas = [p for p in map(normalizar_palavra, palavras) if p]
+    # O texto cifrado não tem espaços: os n-gramas atravessam as palavras.
+    codigos = codificar(''.join(normalizadas))
+    contagens = [contar_ngramas(codigos, ordem) for ordem in range(1, ORDEM_MAXIMA + 1)]
+    salvar_modelo(contagens, normalizadas, caminho)
+
+# ============================================
+# ===== Modelo a partir de um diretório ======
+# ============================================
+
+# Caracteres lidos por trecho (o trecho é estendido até o próximo espaço)
+TAMANHO_TRECHO = 1 << 22
+
+def normalizar_trecho(texto):
+    """Mesma normalização de GeraEP1.parse: minúsculas, sem acentos, só a-z."""
+    from unidecode import unidecode
+    return re.sub(r"[^a-z]", "", unidecode(texto.lower()))
+
+def ler_trechos(diretorio, tamanho_trecho=TAMANHO_TRECHO):
+    """Gera os trechos de todos os .txt (iso-8859-1) do diretório, sem cortar palavras."""
+    for nome in sorted(os.listdir(diretorio)):
+        if not nome.endswith(".txt"):
+            continue
+        with open(os.path.join(diretorio, nome), "r", encoding="iso-8859-1") as f:
+            while True:
+                trecho = f.read(tamanho_trecho)
+                if not trecho:
+                    break
+                while not trecho[-1].isspace():
+                    c = f.read(1)
+                    if not c:
+                        break
+                    trecho += c
+                yield trecho
+
+def _contar_trecho(trecho):
+    """Contagens de ordem 1..ORDEM_MAXIMA e vocabulário de um trecho (roda no pool)."""
+    from unidecode import unidecode
+    palavras = set(re.findall(r"[a-z]+", unidecode(trecho.lower())))
+    codigos = codificar(normalizar_trecho(trecho))
+    contagens = [contar_ngramas(codigos, ordem) for ordem in range(1, ORDEM_MAXIMA + 1)]
+    borda = ORDEM_MAXIMA - 1
+    return contagens, palavras, codigos[:borda], codigos[-borda:], len(codigos)
+
+def _contar_juncao(contagens, cauda, cabeca):
+    """Soma os n-gramas que atravessam a junção entre dois trechos seguidos."""
+    juncao = np.concatenate([cauda, cabeca])
+    for ordem in range(2, ORDEM_MAXIMA + 1):
+        idx = indices_ngramas(juncao, ordem)
+        inicios = np.arange(len(idx))
+        # Só os que começam na cauda e terminam na cabeça
+        atravessam = (inicios < len(cauda)) & (inicios + ordem > len(cauda))
+        np.add.at(contagens[ordem - 1], idx[atravessam], 1)
+
+def contar_diretorio(diretorio, tamanho_trecho=TAMANHO_TRECHO, max_workers=None):
+    """Conta n-gramas e vocabulário de um diretório de textos em fluxo, num pool de processos.
+
+    Os trechos são contados em paralelo e somados na ordem de leitura, com
+    poucos trechos em voo por vez: a memória não depende do tamanho do corpus.
+    O texto é tratado como contínuo (os n-gramas atravessam trechos e arquivos).
+    """
+    contagens = [np.zeros(MOD ** ordem, dtype=np.int64) for ordem in range(1, ORDEM_MAXIMA + 1)]
+    palavras = set()
+    cauda = np.zeros(0, dtype=np.uint8)
+
+    def juntar(resultado):
+        nonlocal cauda
+        parciais, vocab, cabeca, fim, n = resultado
+        for total, parcial in zip(contagens, parciais):
+            total += parcial
+        palavras.update(vocab)
+        _contar_juncao(contagens, cauda, cabeca)
+        cauda = np.concatenate([cauda, fim])[-(ORDEM_MAXIMA - 1):] if n < ORDEM_MAXIMA - 1 else fim
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        em_voo = deque()
+        limite = 2 * (max_workers or os.cpu_count())
+        for trecho in ler_trechos(diretorio, tamanho_trecho):
+            em_voo.append(executor.submit(_contar_trecho, trecho))
+            if len(em_voo) >= limite:
+                juntar(em_voo.popleft().result())
+        while em_voo:
+            juntar(em_voo.popleft().result())
+    return contagens, palavras
+
+def construir_modelo_diretorio(diretorio, caminho=CAMINHO_PADRAO, tamanho_trecho=TAMANHO_TRECHO, max_workers=None):
+    """Gera o modelo a partir de todos os .txt de um diretório (ex.: ``textos`` do GeraEP1)."""
+    contagens, palavras = contar_diretorio(diretorio, tamanho_trecho, max_workers)
+    salvar_modelo(contagens, palavras, caminho)
+
+class ModeloLinguagem:
+    """Tabelas do modelo (views sobre o memory map)."""
+
+    def __init__(self, secoes):
+        # np.asarray tira a subclasse memmap (mais barata de indexar) sem copiar
+        self.freq_letras = np.asarray(secoes['freq_letras'])
+        self.log = {ordem: np.asarray(secoes[f'log{ordem}']) for ordem in range(1, ORDEM_MAXIMA + 1)}
+        self.log1, self.log2, self.log3, self.log4 = (self.log[o] for o in range(1, 5))
+        self._secoes = secoes
+        self._palavras = None
+
+    @property
+    def palavras(self):
+        """Vocabulário normalizado (construído na primeira consulta)."""
+        if self._palavras is None:
+            self._palavras = frozenset(bytes(self._secoes['palavras']).decode('ascii').split('\n'))
+        return self._palavras
+
+    def tem_secao(self, nome):
+        return nome in self._secoes
+
+    def secao(self, nome):
+        return np.asarray(self._secoes[nome])
+
+    def freq_dict(self):
+        return dict(zip(ALFABETO, self.freq_letras.tolist()))
+
+_modelos = {}
+
+def carregar_modelo(caminho=CAMINHO_PADRAO):
+    """Carrega (e gera, se ainda não existir) o modelo; uma vez por processo."""
+    if caminho not in _modelos:
+        if not os.path.exists(caminho):
+            print("Gerando modelo de linguagem...")
+            construir_modelo(caminho=caminho)
+        _modelos[caminho] = ModeloLinguagem(ler_secoes(caminho))
+    return _modelos[caminho]
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        construir_modelo_diretorio(sys.argv[1])
+    else:
+        construir_modelo()
+    print(f"Modelo gravado em {CAMINHO_PADRAO}")
@@ -1,28 +1,24 @@
-import nltk
-import math
-import random
-import unicodedata
-from collections import defaultdict
+import sys
+import os
+from itertools import combinations, product
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modelo_linguagem import carregar_modelo, codificar, decodificar, indices_ngramas
+from pontuacao import PESOS_PADRAO, codificar_lote, pontuar_ngramas
+from dicionario import carregar_automato
+from texto import TextoCodificado
+from reinicios import executar_reinicios
+import telemetria
 
 # ============================================
-# ======== Preparação do Corpus ==============
+# ======== Modelo de linguagem ===============
 # ============================================
 
-try:
-    nltk.data.find('corpora/floresta')
-except LookupError:
-    nltk.download('floresta')
+modelo = carregar_modelo()
 
-from nltk.corpus import floresta
-
-def remover_acentos(txt):
-    return ''.join(c for c in unicodedata.normalize('NFD', txt)
-                   if unicodedata.category(c) != 'Mn')
-
-# Lista de palavras portuguesas
-PALAVRAS_PT = set(
-    remover_acentos(w.lower()) for w in floresta.words() if w.isalpha()
-)
+# Lista de palavras portuguesas e o autômato que as procura no texto
+PALAVRAS_PT = modelo.palavras
+automato = carregar_automato(modelo)
 
 # Lista de padrões linguísticos (palavras e sufixos comuns)
 PADROES = [
@@ -31,38 +27,6 @@ PADROES = [
     'mento', 'dade', 'acao', 'aria', 'avel', 'ivel', 'eiro', 'osa', 'oso'
 ]
 
-# Gerar modelo de bigramas e trigramas
-def gerar_ngramas_corpus():
-    texto = ' '.join(floresta.words())
-    texto = remover_acentos(texto.lower())
-    texto = ''.join(c for c in texto if c.isalpha())
-
-    bigramas = defaultdict(lambda: 1e-8)
-    trigramas = defaultdict(lambda: 1e-8)
-    total_bi = 0
-    total_tri = 0
-
-    for i in range(len(texto) - 1):
-        par = texto[i:i+2]
-        bigramas[par] += 1
-        total_bi += 1
-
-    for i in range(len(texto) - 2):
-        tri = texto[i:i+3]
-        trigramas[tri] += 1
-        total_tri += 1
-
-    for k in bigramas:
-        bigramas[k] /= total_bi
-    for k in trigramas:
-        trigramas[k] /= total_tri
-
-    return bigramas, trigramas
-
-print("Gerando modelo de n-gramas...")
-bigramas_freq, trigramas_freq = gerar_ngramas_corpus()
-print("Modelo gerado.")
-
 # ============================================
 # =============== Funções ====================
 # ============================================
@@ -71,23 +35,13 @@ ALFABETO = 'abcdefghijklmnopqrstuvwxyz'
 
 def aplicar_chave(texto, chave):
     tabela = str.maketrans(ALFABETO, chave)
-    return texto.translate(tabela)
+    return str(texto).translate(tabela)
 
 def score_ngramas(texto):
-    score = 0.0
-    for i in range(len(texto) - 1):
-        score += math.log(bigramas_freq.get(texto[i:i+2], 1e-8))
-    for i in range(len(texto) - 2):
-        score += math.log(trigramas_freq.get(texto[i:i+3], 1e-8))
-    return score
+    return pontuar_ngramas(codificar(texto), modelo=modelo)
 
 def score_palavras(texto):
-    count = 0
-    for i in range(len(texto) - 2):
-        for j in range(3, min(10, len(texto) - i + 1)):
-            if texto[i:i+j] in PALAVRAS_PT:
-                count += 1
-    return count
+    return int(automato.varrer(codificar(texto), 3, 9).contagem[0])
 
 def score_padroes(texto):
     count = 0
@@ -102,96 +56,249 @@ def score_total(texto, w_ngram=1.0, w_palavra=2.0, w_padrao=1.5):
         w_padrao * score_padroes(texto)
     )
 
+# Índices base 26 dos padrões, agrupados por tamanho
+PADROES_POR_TAMANHO = {
+    L: np.array([indices_ngramas(codificar(p), L)[0] for p in PADROES if len(p) == L])
+    for L in sorted({len(p) for p in PADROES})
+}
+
+def score_padroes_lote(lote):
+    """score_padroes de cada linha de um lote codificado (ocorrências sobrepostas contam)."""
+    lote = np.atleast_2d(lote)
+    count = np.zeros(lote.shape[0], dtype=np.int64)
+    for L, indices in PADROES_POR_TAMANHO.items():
+        count += np.isin(indices_ngramas(lote, L), indices).sum(axis=1)
+    return count
+
+def score_total_codificado(lote, w_ngram=1.0, w_palavra=2.0, w_padrao=1.5):
+    """score_total de um lote (n_textos, n) de textos já codificados, todo vetorizado."""
+    return (
+        w_ngram * pontuar_ngramas(lote, modelo=modelo) +
+        w_palavra * automato.varrer(lote, 3, 9).contagem +
+        w_padrao * score_padroes_lote(lote)
+    )
+
+def score_total_lote(textos, w_ngram=1.0, w_palavra=2.0, w_padrao=1.5):
+    """score_total de vários textos de mesmo tamanho."""
+    return score_total_codificado(codificar_lote(textos), w_ngram, w_palavra, w_padrao).tolist()
+
 # ============================================
 # ========= Algoritmo Genético ===============
 # ============================================
 
-def algoritmo_genetico(cipher_text, pop_size=100, geracoes=300, elite_size=5, taxa_mutacao=0.2):
+# A população é um array (pop_size, 26) uint8: linha i é a chave i
+# (letra cifrada -> letra clara), e decifrar é um gather populacao[:, cifra].
+
+def algoritmo_genetico(cipher_text, pop_size=100, geracoes=300, elite_size=5, taxa_mutacao=0.2, n_pais=50):
+    cifra = TextoCodificado.de(cipher_text).codigos
     # Inicialização
-    populacao = [''.join(random.sample(ALFABETO, len(ALFABETO))) for _ in range(pop_size)]
+    populacao = np.argsort(np.random.rand(pop_size, len(ALFABETO)), axis=1).astype(np.uint8)
 
     melhor = None
     melhor_score = float('-inf')
 
     for geracao in range(geracoes):
-        scores = []
-        for chave in populacao:
-            texto = aplicar_chave(cipher_text, chave)
-            s = score_total(texto)
-            scores.append((s, chave))
-
-            if s > melhor_score:
-                melhor = chave
-                melhor_score = s
-
-        scores.sort(reverse=True)
-
-        nova_pop = [chave for (_, chave) in scores[:elite_size]]
-
-        while len(nova_pop) < pop_size:
-            pai1, pai2 = random.choices(scores[:50], k=2)
-            filho = crossover(pai1[1], pai2[1])
-            if random.random() < taxa_mutacao:
-                filho = mutar(filho)
-            nova_pop.append(filho)
-
-        populacao = nova_pop
-
-        if geracao % 20 == 0 or geracao == geracoes -1:
-            print(f"[Geração {geracao}] Melhor score: {melhor_score}")
+        scores = score_total_codificado(populacao[:, cifra])
+
+        telemetria.contar(pop_size)
+        i = int(np.argmax(scores))
+        if scores[i] > melhor_score:
+            melhor = populacao[i].copy()
+            melhor_score = float(scores[i])
+            telemetria.melhor(melhor_score, lambda: aplicar_chave(cipher_text, decodificar(melhor)))
+
+        ordem = np.argsort(-scores, kind='stable')
+        pais = populacao[ordem[:n_pais]]
+
+        n_filhos = pop_size - elite_size
+        pai1 = pais[np.random.randint(len(pais), size=n_filhos)]
+        pai2 = pais[np.random.randint(len(pais), size=n_filhos)]
+        filhos = crossover(pai1, pai2, np.random.randint(5, 21, size=n_filhos))
+        filhos = mutar(filhos, np.random.rand(n_filhos) < taxa_mutacao)
+
+        populacao = np.concatenate([populacao[ordem[:elite_size]], filhos])
+
+    return decodificar(melhor)
+
+
+def crossover(p1, p2, cortes):
+    """Crossover de ordem em lote: prefixo de p1 até o corte, depois as letras restantes na ordem de p2."""
+    n, tamanho = p1.shape
+    posicoes = np.arange(tamanho)
+    no_prefixo = posicoes[None, :] < cortes[:, None]
+    usadas = np.zeros((n, tamanho), dtype=bool)
+    np.put_along_axis(usadas, p1.astype(np.intp), no_prefixo, axis=1)
+    resto = ~np.take_along_axis(usadas, p2.astype(np.intp), axis=1)
+    # Ordena [p1 | p2] pela posição que cada letra ocupa no filho; o que sobra vai para o fim
+    ordem = np.concatenate([
+        np.where(no_prefixo, posicoes, 3 * tamanho),
+        np.where(resto, tamanho + posicoes, 3 * tamanho),
+    ], axis=1)
+    escolhidas = np.argsort(ordem, axis=1, kind='stable')[:, :tamanho]
+    return np.take_along_axis(np.concatenate([p1, p2], axis=1), escolhidas, axis=1)
+
+def mutar(chaves, quais):
+    """Troca duas posições aleatórias das chaves marcadas em ``quais``."""
+    chaves = chaves.copy()
+    linhas = np.flatnonzero(quais)
+    a = np.random.randint(len(ALFABETO), size=len(linhas))
+    b = (a + np.random.randint(1, len(ALFABETO), size=len(linhas))) % len(ALFABETO)
+    chaves[linhas, a], chaves[linhas, b] = chaves[linhas, b], chaves[linhas, a]
+    return chaves
 
-    return melhor
-
-
-def crossover(p1, p2):
-    corte = random.randint(5, 20)
-    filho = list(p1[:corte])
-    for c in p2:
-        if c not in filho:
-            filho.append(c)
-    return ''.join(filho)
+# ============================================
+# ==== Pontuação incremental (Jakobsen) ======
+# ============================================
 
-def mutar(chave):
-    a, b = random.sample(range(len(chave)), 2)
-    lst = list(chave)
-    lst[a], lst[b] = lst[b], lst[a]
-    return ''.join(lst)
+# As 325 trocas possíveis de duas letras da chave
+PARES_TROCA = np.array(list(combinations(range(len(ALFABETO)), 2)))
+
+def _desdobrar(T, eixo):
+    """Matriz (26, resto) com o eixo escolhido nas linhas."""
+    return np.moveaxis(T, eixo, 0).reshape(T.shape[eixo], -1)
+
+def _contrair(T, eixos):
+    """Contrai os eixos de T com u = e_a - e_b, para cada troca (a, b) de PARES_TROCA.
+
+    Devolve um array (n_trocas, resto) com a soma sinalizada das fatias
+    T[a|b, ..., a|b, resto].
+    """
+    T = np.moveaxis(T, eixos, range(len(eixos)))
+    T = T.reshape(T.shape[:len(eixos)] + (-1,))
+    out = np.zeros((len(PARES_TROCA), T.shape[-1]))
+    for escolha in product((0, 1), repeat=len(eixos)):
+        idx = tuple(PARES_TROCA[:, e] for e in escolha)
+        out += (-1) ** sum(escolha) * T[idx]
+    return out
+
+class AvaliadorTrocas:
+    """Pontua todas as trocas de duas letras da chave sem redecifrar o texto.
+
+    As matrizes de contagem de bigramas/trigramas do texto cifrado (A) são
+    montadas uma única vez. O score de uma chave k é <A, M>, com M a tabela
+    do modelo com linhas e colunas permutadas por k. Trocar a e b equivale a
+    refletir cada eixo por P = I - u u^T (u = e_a - e_b); expandindo o
+    produto, a variação de todas as 325 trocas sai de contrações de A e M
+    nos subconjuntos de eixos, com custo independente do tamanho do texto.
+    """
+
+    def __init__(self, cipher_text, pesos=PESOS_PADRAO):
+        cifra = TextoCodificado.de(cipher_text)
+        self.termos = []
+        for ordem, peso in pesos.items():
+            A = peso * cifra.contagem_ngramas(ordem).reshape((len(ALFABETO),) * ordem)
+            subconjuntos = [
+                eixos for r in range(1, ordem + 1) for eixos in combinations(range(ordem), r)
+            ]
+            # A contraído não depende da chave: calcula-se uma vez só. Para um
+            # eixo basta A desdobrado, e o termo sai de um produto 26x26.
+            contraidos = [
+                (eixos, _desdobrar(A, eixos[0]) if len(eixos) == 1 else _contrair(A, eixos))
+                for eixos in subconjuntos
+            ]
+            self.termos.append((A, modelo.log[ordem], contraidos))
+
+    @staticmethod
+    def _permutada(tabela, k):
+        return tabela[np.ix_(*[k] * tabela.ndim)]
+
+    def pontuar(self, k):
+        """Score de n-gramas da chave k (array: letra cifrada -> letra clara)."""
+        return float(sum((A * self._permutada(tabela, k)).sum() for A, tabela, _ in self.termos))
+
+    def deltas(self, k):
+        """Variação do score para cada troca de PARES_TROCA, em uma única passada."""
+        delta = np.zeros(len(PARES_TROCA))
+        for _, tabela, contraidos in self.termos:
+            M = self._permutada(tabela, k)
+            for eixos, CA in contraidos:
+                if len(eixos) == 1:
+                    G = CA @ _desdobrar(M, eixos[0]).T
+                    a, b = PARES_TROCA[:, 0], PARES_TROCA[:, 1]
+                    delta -= G[a, a] + G[b, b] - G[a, b] - G[b, a]
+                else:
+                    delta += (-1) ** len(eixos) * np.einsum('ij,ij->i', CA, _contrair(M, eixos))
+        return delta
+
+def subir_jakobsen(avaliador, k, max_passos=5000):
+    """Subida de encosta: aplica a melhor troca até nenhuma melhorar o score."""
+    k = k.copy()
+    for _ in range(max_passos):
+        deltas = avaliador.deltas(k)
+        telemetria.contar(len(deltas))
+        melhor = int(np.argmax(deltas))
+        if deltas[melhor] <= 1e-9:
+            break
+        a, b = PARES_TROCA[melhor]
+        k[a], k[b] = k[b], k[a]
+    return k
+
+def chave_por_frequencia(cipher_text):
+    """Chave inicial de Jakobsen: letras cifradas e claras ordenadas por frequência."""
+    cont = TextoCodificado.de(cipher_text).contagem_letras()
+    k = np.empty(len(ALFABETO), dtype=np.intp)
+    k[np.argsort(-cont, kind='stable')] = np.argsort(-modelo.freq_letras, kind='stable')
+    return k
 
 # ============================================
 # === Hill Climbing finalizador ============
 # ============================================
 
 def hill_climbing(cipher_text, chave_inicial, iteracoes=5000):
-    chave = chave_inicial
+    # Cada iteração avalia as 325 trocas de uma vez pelo AvaliadorTrocas
+    avaliador = AvaliadorTrocas(cipher_text)
+    k = subir_jakobsen(avaliador, codificar(chave_inicial).astype(np.intp), iteracoes)
+    chave = decodificar(k)
     texto = aplicar_chave(cipher_text, chave)
-    score = score_total(texto)
+    return chave, texto, score_total(texto)
+
+def ataque_jakobsen(cipher_text, reinicios=50):
+    """Subidas de Jakobsen a partir da chave por frequência e de chaves aleatórias."""
+    cipher_text = TextoCodificado.de(cipher_text)
+    avaliador = AvaliadorTrocas(cipher_text)
+    melhor_k, melhor_score = None, float('-inf')
+    for r in range(reinicios):
+        inicio = chave_por_frequencia(cipher_text) if r == 0 else np.random.permutation(len(ALFABETO))
+        k = subir_jakobsen(avaliador, inicio)
+        s = avaliador.pontuar(k)
+        telemetria.melhor(s, lambda: aplicar_chave(cipher_text, decodificar(k)))
+        if s > melhor_score:
+            melhor_k, melhor_score = k, s
+    chave = decodificar(melhor_k)
+    texto = aplicar_chave(cipher_text, chave)
+    return chave, texto, score_total(texto)
 
-    for _ in range(iteracoes):
-        candidato = mutar(chave)
-        texto_cand = aplicar_chave(cipher_text, candidato)
-        score_cand = score_total(texto_cand)
+# ============================================
+# ======= Reinícios em paralelo ==============
+# ============================================
 
-        if score_cand > score:
-            chave = candidato
-            texto = texto_cand
-            score = score_cand
+def reinicio_genetico(cipher_text):
+    """Um reinício do pipeline algoritmo genético -> hill climbing: (chave, score)."""
+    chave_ag = algoritmo_genetico(cipher_text)
+    chave, _, score = hill_climbing(cipher_text, chave_ag)
+    return chave, score
 
-    return chave, texto, score
+def ataque_reinicios(cipher_text, reinicios=8, semente=0, max_workers=None):
+    """Reinícios independentes do pipeline em um pool de processos, com parada antecipada."""
+    chave, score, _ = executar_reinicios(
+        reinicio_genetico, reinicios, args=(cipher_text,), semente=semente, max_workers=max_workers
+    )
+    return chave, aplicar_chave(cipher_text, chave), score
 
 # ============================================
 # ================ Execução ==================
 # ============================================
 
-cipher_text = "qjseqypdrhigdsgqqyhcjqvqcqmdqgmsibqmmqgliqmqidsgqquhrqdupliqticphdhdhsxpmmqdhxhwuqfqupifpehulipqyhwsuliqdhsliquphbupkhuq"
-plain_text = "evocetinhaumnomeetalvezelesnemsoubessemqueseunomeerahenriquejuliananaodissenadapreferiuficarquietaporquenaoqueriabrigare"
+if __name__ == "__main__":
+    cipher_text = "qjseqypdrhigdsgqqyhcjqvqcqmdqgmsibqmmqgliqmqidsgqquhrqdupliqticphdhdhsxpmmqdhxhwuqfqupifpehulipqyhwsuliqdhsliquphbupkhuq"
+    plain_text = "evocetinhaumnomeetalvezelesnemsoubessemqueseunomeerahenriquejuliananaodissenadapreferiuficarquietaporquenaoqueriabrigare"
 
-print("\nIniciando ataque Premium+...")
+    print("\nIniciando ataque Premium+...")
 
-chave_ag = algoritmo_genetico(cipher_text)
-chave_final, texto_final, score_final = hill_climbing(cipher_text, chave_ag)
+    chave_final, texto_final, score_final = ataque_reinicios(cipher_text)
 
-print("\n======= Resultado Final =======")
-print(f"Chave: {chave_final}")
-print(f"Texto decifrado: {texto_final}")
-print(f"Score final: {score_final}")
-print(f"\n=== Sucesso === \n{texto_final == plain_text}")
+    print("\n======= Resultado Final =======")
+    print(f"Chave: {chave_final}")
+    print(f"Texto decifrado: {texto_final}")
+    print(f"Score final: {score_final}")
+    print(f"\n=== Sucesso === \n{texto_final == plain_text}")
@@ -0,0 +1,45 @@
+"""Pontuação vetorizada de n-gramas sobre lotes de textos codificados.
+
+Um lote é um array 2-D uint8 (uma linha por chave candidata, códigos 0..25).
+A pontuação de todas as linhas sai de um único gather nas tabelas de
+log-probabilidade do modelo seguido de uma soma por linha.
+"""
+import numpy as np
+
+from modelo_linguagem import carregar_modelo, codificar, indices_ngramas
+
+# Pesos padrão: bigramas + trigramas, como no score original do mono
+PESOS_PADRAO = {2: 1.0, 3: 1.0}
+
+# Limite de n-gramas por gather, para não estourar memória com lotes enormes
+MAX_ELEMENTOS = 1 << 22
+
+def codificar_lote(textos):
+    """Lista de textos de mesmo tamanho -> array (n_textos, n) uint8."""
+    if not textos:
+        return np.zeros((0, 0), dtype=np.uint8)
+    return codificar(''.join(textos)).reshape(len(textos), -1)
+
+def pontuar_ngramas(lote, pesos=PESOS_PADRAO, modelo=None):
+    """Soma ponderada das log-probabilidades de n-gramas de cada linha do lote.
+
+    Aceita um texto codificado (1-D, devolve escalar) ou um lote 2-D
+    (devolve um array float64 com uma pontuação por linha).
+    """
+    modelo = modelo or carregar_modelo()
+    lote = np.asarray(lote)
+    if lote.ndim == 1:
+        return float(pontuar_ngramas(lote[None, :], pesos, modelo)[0])
+
+    total = np.zeros(lote.shape[0])
+    passo = max(1, MAX_ELEMENTOS // max(lote.shape[1], 1))
+    for inicio in range(0, lote.shape[0], passo):
+        bloco = lote[inicio:inicio + passo]
+        for ordem, peso in pesos.items():
+            tabela = modelo.log[ordem].ravel()
+            total[inicio:inicio + passo] += peso * tabela[indices_ngramas(bloco, ordem)].sum(axis=1, dtype=np.float64)
+    return total
+
+def pontuar_textos(textos, pesos=PESOS_PADRAO, modelo=None):
+    """Atalho para pontuar uma lista de strings de mesmo tamanho."""
+    return pontuar_ngramas(codificar_lote(textos), pesos, modelo)
@@ -0,0 +1,91 @@
+"""Reinícios independentes de uma busca local espalhados por um pool de processos.
+
+Cada reinício recebe sua própria semente (derivada da semente base e do
+seu índice), então o resultado de um reinício não depende de quantos
+processos existem nem da ordem em que terminam. Assim que vários
+reinícios chegam à mesma chave (ou algum atinge o score alvo), os que ainda
+não começaram são cancelados; os que já estão rodando terminam normalmente
+e seus resultados são descartados.
+
+O melhor score até o momento não é repassado aos processos: as buscas
+(hill climbing, algoritmo genético) não têm como usar um limiar externo
+para abandonar um reinício no meio, então o melhor score só é acompanhado
+no processo principal (telemetria e ``score_alvo``).
+"""
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+
+import numpy as np
+
+import telemetria
+
+# Sinal de parada compartilhado com os processos do pool (preenchido pelo inicializador)
+_parar = None
+
+def _iniciar_worker(parar, contar):
+    global _parar
+    _parar = parar
+    if contar:
+        telemetria.ativar_worker()
+
+def semente_reinicio(semente, indice):
+    """Semente do reinício ``indice``, independente das demais."""
+    return int(np.random.SeedSequence([semente, indice]).generate_state(1)[0])
+
+def _executar(tarefa, semente, args):
+    if _parar is not None and _parar.is_set():
+        return None
+    # As buscas do projeto usam random/np.random globais: semeia os dois
+    random.seed(semente)
+    np.random.seed(semente)
+    return tarefa(*args)
+
+def _executar_worker(tarefa, semente, args):
+    """_executar em um processo do pool, devolvendo também os contadores da telemetria."""
+    return _executar(tarefa, semente, args), telemetria.coletar()
+
+def executar_reinicios(tarefa, n_reinicios, args=(), semente=0, max_workers=None,
+                       concordancia=3, score_alvo=None):
+    """Roda ``tarefa(*args) -> (chave, score)`` n_reinicios vezes, cada uma com sua semente.
+
+    Para cedo quando ``concordancia`` reinícios devolvem a mesma chave ou
+    quando algum score chega a ``score_alvo``: os reinícios pendentes são
+    cancelados, mas os que já começaram vão até o fim. ``max_workers=1`` roda tudo
+    no próprio processo. Devolve (melhor chave, melhor score, resultados).
+    """
+    if n_reinicios < 1:
+        raise ValueError(f"n_reinicios deve ser pelo menos 1, não {n_reinicios}")
+    resultados = []
+    contagem = Counter()
+
+    def terminou(chave, score):
+        resultados.append((chave, score))
+        telemetria.contar(nome='reinicios')
+        telemetria.melhor(score)
+        contagem[chave] += 1
+        return contagem[chave] >= concordancia or (score_alvo is not None and score >= score_alvo)
+
+    if max_workers == 1:
+        for i in range(n_reinicios):
+            if terminou(*_executar(tarefa, semente_reinicio(semente, i), args)):
+                break
+    else:
+        contexto = mp.get_context()
+        parar = contexto.Event()
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto,
+                                 initializer=_iniciar_worker, initargs=(parar, telemetria.ativa)) as executor:
+            futuros = [executor.submit(_executar_worker, tarefa, semente_reinicio(semente, i), args)
+                       for i in range(n_reinicios)]
+            for futuro in as_completed(futuros):
+                resultado, contadores = futuro.result()
+                telemetria.somar(contadores)
+                if resultado is not None and terminou(*resultado):
+                    parar.set()
+                    for f in futuros:
+                        f.cancel()
+                    break
+
+    chave, score = max(resultados, key=lambda r: r[1])
+    return chave, score, resultados
@@ -0,0 +1,175 @@
+"""Telemetria leve das buscas, compartilhada por todos os ataques.
+
+Registra candidatos avaliados por segundo, o melhor score ao longo do
+tempo, o tempo até a primeira chave correta (quando o texto aberto de
+referência é conhecido) e o tempo gasto em cada fase do ataque.
+
+Desligada por padrão: cada chamada só testa ``ativa`` e volta, então os
+ataques podem chamá-la à vontade (de preferência uma vez por lote, não por
+candidato). Ligada por ``ativar()`` ou pela variável de ambiente
+TELEMETRIA=<arquivo de trace>, os contadores são amostrados no máximo a
+cada ``intervalo`` segundos e cada amostra ou evento vira uma linha JSON do
+trace. A variável de ambiente só liga a telemetria no processo principal e
+só ele escreve no trace: os processos de um pool ligam apenas a contagem
+(``ativar_worker``) e devolvem seus contadores junto com cada resultado
+(``coletar``), que o processo principal soma aos seus (``somar``).
+"""
+import atexit
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import Counter, defaultdict
+
+ativa = False
+
+_inicio = 0.0
+_fim = None
+_contadores = Counter()
+_fases = defaultdict(float)
+_melhores = []  # (segundos, score) a cada melhora
+_referencia = None
+_tempo_correta = None
+_trace = None
+_pid_trace = None
+_intervalo = 1.0
+_ultima_amostra = (0.0, 0)
+_NULO = contextlib.nullcontext()
+
+def ativar(arquivo_trace=None, referencia=None, intervalo=1.0):
+    """Zera os contadores e liga a telemetria.
+
+    ``referencia`` é o texto aberto esperado, para medir o tempo até a
+    primeira chave correta; ``arquivo_trace`` recebe as amostras em JSONL.
+    """
+    global ativa, _inicio, _fim, _referencia, _tempo_correta, _trace, _pid_trace, _intervalo, _ultima_amostra
+    desativar()
+    _contadores.clear()
+    _fases.clear()
+    _melhores.clear()
+    _referencia, _tempo_correta, _intervalo = referencia, None, intervalo
+    if arquivo_trace:
+        _trace, _pid_trace = open(arquivo_trace, 'a'), os.getpid()
+    _inicio, _fim = time.perf_counter(), None
+    _ultima_amostra = (0.0, 0)
+    ativa = True
+
+def ativar_worker():
+    """Liga só a contagem, sem trace, em um processo de pool.
+
+    Os contadores começam zerados (com fork eles viriam copiados do pai).
+    """
+    global ativa, _trace, _pid_trace, _referencia
+    _contadores.clear()
+    _trace, _pid_trace, _referencia = None, None, None
+    ativa = True
+
+def coletar():
+    """Devolve e zera os contadores locais, para mandar ao processo principal."""
+    contadores = dict(_contadores)
+    _contadores.clear()
+    return contadores
+
+def somar(contadores):
+    """Soma aos contadores deste processo os que vieram de um processo do pool."""
+    if not ativa:
+        return
+    for nome, n in contadores.items():
+        contar(n, nome)
+
+def desativar():
+    """Desliga a telemetria, fecha o trace e devolve o resumo."""
+    global ativa, _fim, _trace
+    if not ativa:
+        return None
+    _fim = _tempo()
+    _escrever('resumo', **resumo())
+    ativa = False
+    if _trace is not None and _pid_trace == os.getpid():
+        _trace.close()
+    _trace = None
+    return resumo()
+
+def _tempo():
+    return time.perf_counter() - _inicio
+
+def _escrever(evento, **dados):
+    if _trace is None or _pid_trace != os.getpid():
+        return
+    linha = {'t': round(_tempo(), 6), 'pid': os.getpid(), 'evento': evento, **dados}
+    _trace.write(json.dumps(linha) + '\n')
+    _trace.flush()
+
+def _amostrar(agora):
+    global _ultima_amostra
+    t0, n0 = _ultima_amostra
+    n = _contadores['candidatos']
+    _escrever('amostra', candidatos=n, candidatos_por_s=(n - n0) / max(agora - t0, 1e-9),
+              melhor=_melhores[-1][1] if _melhores else None, contadores=dict(_contadores))
+    _ultima_amostra = (agora, n)
+
+def contar(n=1, nome='candidatos'):
+    """Soma ``n`` ao contador ``nome`` (por padrão, candidatos avaliados)."""
+    if not ativa:
+        return
+    _contadores[nome] += n
+    agora = _tempo()
+    if agora - _ultima_amostra[0] >= _intervalo:
+        _amostrar(agora)
+
+def melhor(score, texto=None):
+    """Registra um score obtido; só as melhoras entram na série.
+
+    ``texto`` (ou uma função que o devolve, chamada só com a telemetria
+    ligada) é comparado com a referência para o tempo até a chave correta.
+    """
+    global _tempo_correta
+    if not ativa:
+        return
+    agora = _tempo()
+    score = float(score)
+    if not _melhores or score > _melhores[-1][1]:
+        _melhores.append((agora, score))
+        _escrever('melhor', score=score)
+    if _referencia is not None and _tempo_correta is None and texto is not None:
+        if (texto() if callable(texto) else texto) == _referencia:
+            _tempo_correta = agora
+            _escrever('chave_correta', score=score)
+
+def evento(nome, **dados):
+    """Evento avulso no trace (ex.: uma melhora no refinamento)."""
+    if ativa:
+        _escrever(nome, **dados)
+
+@contextlib.contextmanager
+def _medir_fase(nome):
+    inicio = _tempo()
+    _escrever('fase_inicio', fase=nome)
+    try:
+        yield
+    finally:
+        duracao = _tempo() - inicio
+        _fases[nome] += duracao
+        _escrever('fase_fim', fase=nome, segundos=duracao)
+
+def fase(nome):
+    """Context manager que acumula o tempo gasto na fase ``nome``."""
+    return _medir_fase(nome) if ativa else _NULO
+
+def resumo():
+    """Contadores, taxa de candidatos, tempo por fase e série dos melhores scores."""
+    total = _fim if _fim is not None else _tempo()
+    return {
+        'segundos': total,
+        'contadores': dict(_contadores),
+        'candidatos_por_s': _contadores['candidatos'] / total if total > 0 else 0.0,
+        'fases': dict(_fases),
+        'melhores': list(_melhores),
+        'tempo_chave_correta': _tempo_correta,
+    }
+
+# Com spawn, cada processo do pool reimporta o módulo: só o principal liga pelo ambiente
+if os.environ.get('TELEMETRIA') and mp.parent_process() is None:
+    ativar(os.environ['TELEMETRIA'])
+    atexit.register(desativar)
@@ -0,0 +1,93 @@
+"""Texto a-z codificado uma única vez, com estatísticas em cache.
+
+Os ataques recebem o texto cifrado como str e cada fase o convertia de
+novo (``codificar``, ``ord(c) - ord('a')``, ``Counter``). ``TextoCodificado``
+guarda os códigos em um array uint8 somente leitura e calcula sob demanda,
+uma única vez, as contagens de letras e de n-gramas, o índice de
+coincidência e as colunas de cada período; pode ser passado entre fases e
+processos no lugar da str.
+"""
+import numpy as np
+
+from modelo_linguagem import MOD, codificar, decodificar, contar_ngramas
+
+class TextoCodificado:
+    """Códigos 0..25 (view uint8 somente leitura) e estatísticas preguiçosas."""
+
+    def __init__(self, texto):
+        if isinstance(texto, TextoCodificado):
+            codigos = texto.codigos
+        elif isinstance(texto, str):
+            codigos = codificar(texto)
+        else:
+            codigos = np.asarray(texto, dtype=np.uint8).view()
+        # O cache só vale se os códigos não mudarem
+        codigos.flags.writeable = False
+        self.codigos = codigos
+        self._cache = {}
+
+    @classmethod
+    def de(cls, texto):
+        """O próprio objeto se já for um TextoCodificado; senão codifica (str ou array)."""
+        return texto if isinstance(texto, cls) else cls(texto)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __str__(self):
+        if 'str' not in self._cache:
+            self._cache['str'] = decodificar(self.codigos)
+        return self._cache['str']
+
+    def __repr__(self):
+        return f"TextoCodificado({str(self)[:30]!r}{'...' if len(self) > 30 else ''})"
+
+    def __getstate__(self):
+        # Para processos: só os códigos (as estatísticas se recalculam lá)
+        return {'codigos': self.codigos}
+
+    def __setstate__(self, estado):
+        self.__init__(estado['codigos'])
+
+    def _memo(self, chave, calcular):
+        if chave not in self._cache:
+            valor = calcular()
+            if isinstance(valor, np.ndarray):
+                valor.flags.writeable = False
+            self._cache[chave] = valor
+        return self._cache[chave]
+
+    def contagem_letras(self):
+        """Quantas vezes cada letra aparece: array (26,)."""
+        return self._memo('letras', lambda: np.bincount(self.codigos, minlength=MOD).astype(np.int64))
+
+    def contagem_ngramas(self, ordem):
+        """Contagens densas (26**ordem) dos n-gramas, como ``contar_ngramas``."""
+        return self._memo(('ngramas', ordem), lambda: contar_ngramas(self.codigos, ordem))
+
+    def indice_coincidencia(self):
+        """Chance de duas posições distintas sorteadas terem a mesma letra."""
+        def calcular():
+            n = len(self)
+            c = self.contagem_letras()
+            return float((c * (c - 1)).sum() / (n * (n - 1))) if n > 1 else 0.0
+        return self._memo('ic', calcular)
+
+    def colunas(self, periodo):
+        """Coluna j (posições j, j+periodo, ...) de cada j < periodo, como views sem cópia."""
+        return self._memo(('colunas', periodo),
+                          lambda: tuple(self.codigos[j::periodo] for j in range(periodo)))
+
+    def contagem_colunas(self, periodo):
+        """Contagem de letras de cada coluna do período: array (periodo, 26)."""
+        def calcular():
+            posicao = np.arange(len(self)) % periodo
+            return np.bincount(posicao * MOD + self.codigos, minlength=periodo * MOD).reshape(periodo, MOD)
+        return self._memo(('contagem_colunas', periodo), calcular)
+
+    def blocos(self, n):
+        """Blocos (n_blocos, n) para Hill, com padding 'a' no último bloco (view se não precisar)."""
+        resto = (-len(self)) % n
+        if resto == 0:
+            return self.codigos.reshape(-1, n)
+        return np.concatenate([self.codigos, np.zeros(resto, dtype=np.uint8)]).reshape(-1, n)
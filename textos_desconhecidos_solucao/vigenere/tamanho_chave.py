@@ -0,0 +1,82 @@
+"""Estimativa do tamanho da chave de Vigenère só com o texto cifrado.
+
+Tudo sai de uma única autocorrelação por FFT: C(s) conta os pares de
+letras iguais à distância s. Os pares de uma mesma coluna de período K são
+exatamente os de distância múltipla de K, então C dá de uma vez as
+coincidências (índice de coincidência) de todos os períodos candidatos.
+Cada período recebe a log-razão de verossimilhança entre "colunas em
+português deslocado" e "letras aleatórias", somada à evidência de Kasiski
+(distâncias entre trigramas repetidos que são múltiplas de K). Por ser uma
+verossimilhança, múltiplos do período certo (com menos pares) pontuam menos.
+"""
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modelo_linguagem import carregar_modelo, indices_ngramas
+from texto import TextoCodificado
+
+MOD = 26
+
+# Maior período testado por padrão (o gerador usa chaves de até 60 letras)
+MAX_TAMANHO = 100
+
+# Chance de uma distância entre trigramas repetidos ser múltipla do período certo
+PROB_KASISKI = 0.5
+
+def autocorrelacao(codigos):
+    """coincidencias[s]: pares (i, i+s) com a mesma letra, para todo s, via FFT."""
+    n = len(codigos)
+    tamanho = 1 << int(2 * n - 1).bit_length()
+    indicadoras = np.zeros((MOD, n))
+    indicadoras[codigos, np.arange(n)] = 1
+    espectro = np.fft.rfft(indicadoras, tamanho, axis=1)
+    correlacao = np.fft.irfft((espectro * espectro.conj()).sum(axis=0), tamanho)[:n]
+    return np.rint(correlacao).astype(np.int64)
+
+def distancias_kasiski(codigos, ordem=3):
+    """Distâncias entre ocorrências consecutivas de cada n-grama repetido."""
+    idx = indices_ngramas(codigos, ordem)
+    ordenados = np.argsort(idx, kind='stable')
+    mesmo = idx[ordenados[1:]] == idx[ordenados[:-1]]
+    return (ordenados[1:] - ordenados[:-1])[mesmo]
+
+def _somar_multiplos(valores, tamanhos):
+    """Para cada K, soma de valores[s] com s múltiplo de K (s > 0)."""
+    return np.array([valores[k::k].sum() for k in tamanhos])
+
+def pontuar_tamanhos(texto, min_k=1, max_k=MAX_TAMANHO, modelo=None):
+    """Log-verossimilhança de cada período K em min_k..max_k: (tamanhos, scores)."""
+    modelo = modelo or carregar_modelo()
+    codigos = TextoCodificado.de(texto).codigos
+    n = len(codigos)
+    max_k = min(max_k, n // 2)
+    tamanhos = np.arange(max(min_k, 1), max_k + 1)
+
+    p_pt = float((modelo.freq_letras ** 2).sum())
+    p_aleatorio = 1 / MOD
+    iguais = _somar_multiplos(autocorrelacao(codigos), tamanhos)
+    # Pares de distância K, 2K, ..., MK: soma de (n - mK)
+    M = (n - 1) // tamanhos
+    pares = M * n - tamanhos * M * (M + 1) // 2
+    scores = (iguais * np.log(p_pt / p_aleatorio)
+              + (pares - iguais) * np.log((1 - p_pt) / (1 - p_aleatorio)))
+
+    distancias = distancias_kasiski(codigos)
+    if len(distancias):
+        divisiveis = _somar_multiplos(np.bincount(distancias, minlength=n), tamanhos)
+        p_div = np.maximum(PROB_KASISKI, 1 / tamanhos)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores += np.where(
+                tamanhos > 1,
+                divisiveis * np.log(p_div * tamanhos)
+                + (len(distancias) - divisiveis) * np.log((1 - p_div) / (1 - 1 / tamanhos)),
+                0.0,
+            )
+    return tamanhos, scores
+
+def estimar_tamanho_chave(texto, top=5, min_k=1, max_k=MAX_TAMANHO):
+    """Os ``top`` períodos mais prováveis, do melhor para o pior: [(K, score)]."""
+    tamanhos, scores = pontuar_tamanhos(texto, min_k, max_k)
+    ordem = np.argsort(-scores, kind='stable')[:top]
+    return [(int(tamanhos[i]), float(scores[i])) for i in ordem]
@@ -1,168 +1,347 @@
 import numpy as np
-import unicodedata
-import nltk
 import random
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modelo_linguagem import carregar_modelo, codificar, decodificar
+from pontuacao import pontuar_ngramas
+from dicionario import SENTINELA, carregar_automato
+from texto import TextoCodificado
+from tamanho_chave import estimar_tamanho_chave
+from reinicios import executar_reinicios
+import telemetria
 
-# Dependências: nltk, numpy
-try:
-    nltk.data.find('corpora/floresta')
-except LookupError:
-    nltk.download('floresta')
-from nltk.corpus import floresta
-
-# Remover acentos
-def remover_acentos(palavra):
-    return ''.join(ch for ch in unicodedata.normalize('NFD', palavra)
-                   if unicodedata.category(ch) != 'Mn')
-
-# Palavras válidas
-fl_palavras = [remover_acentos(w.lower()) for w in floresta.words() if w.isalpha()]
-dicionario = set(w for w in fl_palavras if len(w) >= 4)
-
-# Contagem de bigramas e trigramas
-bigram_counts, trigram_counts = {}, {}
-total_bigrams = total_trigrams = 0
-for w in fl_palavras:
-    for i in range(len(w)-1):
-        bi = w[i:i+2]
-        bigram_counts[bi] = bigram_counts.get(bi, 0) + 1
-        total_bigrams += 1
-    for i in range(len(w)-2):
-        tri = w[i:i+3]
-        trigram_counts[tri] = trigram_counts.get(tri, 0) + 1
-        total_trigrams += 1
-V_bi, V_tri = 26*26, 26*26*26
+# Dependências: numpy (modelo gerado por modelo_linguagem.py)
+modelo = carregar_modelo()
+
+# Palavras válidas: autômato do vocabulário, varrido com 4 a 10 letras
+automato = carregar_automato(modelo)
 
 # Frequências de letras em português (normalizadas)
-freq_portuguese = {
-    'a': 0.132272, 'b': 0.009191, 'c': 0.035846, 'd': 0.053079,
-    'e': 0.153723, 'f': 0.008042, 'g': 0.012638, 'h': 0.008042,
-    'i': 0.078339, 'j': 0.001838, 'k': 0.000005, 'l': 0.031020,
-    'm': 0.050092, 'n': 0.047105, 'o': 0.104319, 'p': 0.018382,
-    'q': 0.008272, 'r': 0.059743, 's': 0.057445, 't': 0.050092,
-    'u': 0.038143, 'v': 0.018612, 'w': 0.000004, 'x': 0.001378,
-    'y': 0.000008, 'z': 0.003217
-}
-total_freq = sum(freq_portuguese.values())
-freq_portuguese = {k: v/total_freq for k, v in freq_portuguese.items()}
+freq_portuguese = modelo.freq_dict()
+
+# Trigramas com peso dobrado; bônus por palavra de 4 a 10 letras
+PESOS_NGRAMAS = {2: 1.0, 3: 2.0}
+PESO_PALAVRA = 7.0
+MIN_PALAVRA, MAX_PALAVRA = 4, 10
 
 def decifrar_vigenere(texto, chave):
-    res = []
-    k = len(chave)
-    for i, c in enumerate(texto):
-        if 'a' <= c <= 'z':
-            c_val = ord(c) - ord('a')
-            k_val = ord(chave[i % k]) - ord('a')
-            res.append(chr((c_val - k_val) % 26 + ord('a')))
-        else:
-            res.append(c)
-    return ''.join(res)
+    if isinstance(texto, TextoCodificado):
+        return decodificar((texto.codigos + 26 - np.resize(codificar(chave), len(texto))) % 26)
+    # Em str, o que não é a-z passa direto (mas conta na posição da chave)
+    bruto = np.frombuffer(texto.encode('utf-32-le'), dtype=np.uint32) - np.uint32(ord('a'))
+    letras = bruto < 26
+    deslocado = (bruto + 26 - np.resize(codificar(chave), len(bruto))) % 26
+    return (np.where(letras, deslocado, bruto) + np.uint32(ord('a'))).astype(np.uint32).tobytes().decode('utf-32-le')
 
 def pontuacao_texto(txt):
-    score = 0.0
-    for i in range(len(txt)-1):
-        bi = txt[i:i+2]
-        if bi.isalpha():
-            cnt = bigram_counts.get(bi, 0)
-            score += np.log((cnt + 1) / (total_bigrams + V_bi))
-    for i in range(len(txt)-2):
-        tri = txt[i:i+3]
-        if tri.isalpha():
-            cnt = trigram_counts.get(tri, 0)
-            score += 2 * np.log((cnt + 1) / (total_trigrams + V_tri))
-    palavras = 0
-    for sz in range(4, 11):
-        for i in range(len(txt)-sz+1):
-            if txt[i:i+sz] in dicionario:
-                palavras += 1
-    score += 7.0 * palavras
+    codigos = TextoCodificado.de(txt).codigos
+    score = pontuar_ngramas(codigos, PESOS_NGRAMAS, modelo)
+    palavras = automato.varrer(codigos, MIN_PALAVRA, MAX_PALAVRA).contagem[0]
+    score += PESO_PALAVRA * palavras
     return score
 
+class AvaliadorIncremental:
+    """Mantém o texto decifrado e a contribuição de cada posição ao score.
+
+    Uma letra da chave na posição j só altera os caracteres j, j+K, j+2K, ...;
+    ao mudá-la, recalcula-se apenas os bigramas, trigramas e janelas de
+    palavras que tocam esses caracteres (cerca de 1/K de pontuacao_texto).
+    """
+
+    def __init__(self, texto, chave):
+        self.cifra = TextoCodificado.de(texto).codigos.astype(np.intp)
+        self.n = len(self.cifra)
+        self.k = codificar(chave).astype(np.intp)
+        self.K = len(self.k)
+        self.plano = (self.cifra - np.resize(self.k, self.n)) % 26
+        self._cache_janelas = {}
+        todas = np.arange(self.n)
+        self.bi = self._bigramas(todas[:max(self.n - 1, 0)])
+        self.tri = self._trigramas(todas[:max(self.n - 2, 0)])
+        self.pal = automato.varrer(self.plano, MIN_PALAVRA, MAX_PALAVRA).inicios[0]
+        self.score = (self.bi.sum(dtype=np.float64) * PESOS_NGRAMAS[2]
+                      + self.tri.sum(dtype=np.float64) * PESOS_NGRAMAS[3]
+                      + PESO_PALAVRA * self.pal.sum())
+
+    @property
+    def chave(self):
+        return ''.join(chr(v + ord('a')) for v in self.k)
+
+    @property
+    def texto(self):
+        return decodificar(self.plano)
+
+    def _bigramas(self, ini):
+        p = self.plano
+        return modelo.log2[p[ini], p[ini + 1]]
+
+    def _trigramas(self, ini):
+        p = self.plano
+        return modelo.log3[p[ini], p[ini + 1], p[ini + 2]]
+
+    def _palavras(self, ini):
+        # Uma janela de MAX_PALAVRA letras por início, varridas juntas pelo autômato
+        janelas = ini[:, None] + np.arange(MAX_PALAVRA)
+        trechos = np.where(janelas < self.n, self.plano[np.minimum(janelas, self.n - 1)], SENTINELA)
+        return automato.contar_prefixos(trechos, MIN_PALAVRA, MAX_PALAVRA)
+
+    def _inicios(self, posicoes, largura, ultimo):
+        """Inícios de janela de ``largura`` caracteres que cobrem alguma das posições."""
+        ini = (posicoes[:, None] - np.arange(largura)).ravel()
+        return np.unique(ini[(ini >= 0) & (ini <= ultimo)])
+
+    def _janelas(self, pos):
+        """Posições do texto e janelas afetadas pela posição ``pos`` da chave (memorizadas)."""
+        if pos not in self._cache_janelas:
+            posicoes = np.arange(pos, self.n, self.K)
+            self._cache_janelas[pos] = (posicoes, (
+                self._inicios(posicoes, 2, self.n - 2),
+                self._inicios(posicoes, 3, self.n - 3),
+                self._inicios(posicoes, MAX_PALAVRA, self.n - MIN_PALAVRA),
+            ))
+        return self._cache_janelas[pos]
+
+    def _mudar_letra(self, pos, valor):
+        """Atualiza a chave e o texto decifrado; devolve as janelas afetadas."""
+        posicoes, janelas = self._janelas(pos)
+        self.k[pos] = valor
+        self.plano[posicoes] = (self.cifra[posicoes] - valor) % 26
+        return janelas
+
+    def _trocar(self, pos, valor):
+        """Troca a letra da chave e devolve (delta, janelas, contribuições novas)."""
+        janelas = self._mudar_letra(pos, valor)
+        novos = (self._bigramas(janelas[0]), self._trigramas(janelas[1]), self._palavras(janelas[2]))
+        delta = (
+            PESOS_NGRAMAS[2] * (novos[0].sum(dtype=np.float64) - self.bi[janelas[0]].sum(dtype=np.float64))
+            + PESOS_NGRAMAS[3] * (novos[1].sum(dtype=np.float64) - self.tri[janelas[1]].sum(dtype=np.float64))
+            + PESO_PALAVRA * (novos[2].sum() - self.pal[janelas[2]].sum())
+        )
+        return delta, janelas, novos
+
+    def avaliar(self, pos, letra):
+        """Score que o texto teria com ``letra`` na posição ``pos`` da chave (sem aplicar)."""
+        antigo = int(self.k[pos])
+        delta, _, _ = self._trocar(pos, ord(letra) - ord('a'))
+        self._mudar_letra(pos, antigo)
+        return self.score + delta
+
+    def pontuar_combinacoes(self, posicoes, combinacoes):
+        """Variação do score para cada linha de ``combinacoes`` (letras nas ``posicoes`` da chave).
+
+        Só os caracteres e janelas afetados pelas posições entram: montam-se
+        como um array (n_combinacoes, caracteres necessários) e todos os
+        bigramas, trigramas e palavras são pontuados de uma vez.
+        """
+        afetadas = [self._janelas(p) for p in posicoes]
+        bi, tri, pal = (np.unique(np.concatenate([a[1][t] for a in afetadas])) for t in range(3))
+        janelas_pal = pal[:, None] + np.arange(MAX_PALAVRA)
+        necessarios = np.unique(np.concatenate([bi, bi + 1, tri, tri + 1, tri + 2, janelas_pal[janelas_pal < self.n]]))
+        local = lambda idx: np.searchsorted(necessarios, idx)
+
+        P = np.repeat(self.plano[necessarios][None, :], len(combinacoes), axis=0)
+        for coluna, (posicoes_texto, _) in enumerate(afetadas):
+            P[:, local(posicoes_texto)] = (self.cifra[posicoes_texto][None, :] - combinacoes[:, coluna:coluna + 1]) % 26
+
+        novo = (PESOS_NGRAMAS[2] * modelo.log2[P[:, local(bi)], P[:, local(bi + 1)]].sum(axis=1, dtype=np.float64)
+                + PESOS_NGRAMAS[3] * modelo.log3[P[:, local(tri)], P[:, local(tri + 1)], P[:, local(tri + 2)]].sum(axis=1, dtype=np.float64))
+        trechos = np.where(janelas_pal < self.n, P[:, local(np.minimum(janelas_pal, self.n - 1))], SENTINELA)
+        palavras = automato.contar_prefixos(trechos.reshape(-1, MAX_PALAVRA), MIN_PALAVRA, MAX_PALAVRA)
+        novo += PESO_PALAVRA * palavras.reshape(len(combinacoes), -1).sum(axis=1)
+
+        atual = (PESOS_NGRAMAS[2] * self.bi[bi].sum(dtype=np.float64)
+                 + PESOS_NGRAMAS[3] * self.tri[tri].sum(dtype=np.float64)
+                 + PESO_PALAVRA * self.pal[pal].sum())
+        return novo - atual
+
+    def melhor_combinacao(self, posicoes):
+        """Melhor combinação de letras (códigos) para as ``posicoes`` da chave e o score resultante.
+
+        Até MAX_COMBINACOES o produto 26^len(posicoes) é pontuado inteiro;
+        acima disso cada posição fica só com as LETRAS_POR_POSICAO letras de
+        melhor variação sozinha (as outras posições como estão na chave) e
+        só o produto dessas é pontuado.
+        """
+        posicoes = list(posicoes)
+        letras = [np.arange(26)] * len(posicoes)
+        if 26 ** len(posicoes) > MAX_COMBINACOES:
+            letras = [np.argsort(-self.pontuar_combinacoes([p], np.arange(26)[:, None]))[:LETRAS_POR_POSICAO]
+                      for p in posicoes]
+            telemetria.contar(26 * len(posicoes))
+        combinacoes = np.stack(np.meshgrid(*letras, indexing='ij'), axis=-1).reshape(-1, len(posicoes))
+        telemetria.contar(len(combinacoes))
+        # Tamanho do lote pelo número de janelas de palavra afetadas
+        por_combinacao = MAX_PALAVRA * sum(len(self._janelas(p)[1][2]) for p in posicoes) + 1
+        passo = max(1, MAX_ELEMENTOS_LOTE // por_combinacao)
+        deltas = np.concatenate([
+            self.pontuar_combinacoes(posicoes, combinacoes[i:i + passo])
+            for i in range(0, len(combinacoes), passo)
+        ])
+        melhor = int(np.argmax(deltas))
+        return combinacoes[melhor].tolist(), self.score + deltas[melhor]
+
+    def aplicar(self, pos, letra):
+        """Fixa ``letra`` na posição ``pos`` da chave e devolve o novo score."""
+        delta, janelas, novos = self._trocar(pos, ord(letra) - ord('a'))
+        self.bi[janelas[0]], self.tri[janelas[1]], self.pal[janelas[2]] = novos
+        self.score += delta
+        return self.score
+
+# Limite de elementos por lote de combinações em melhor_combinacao
+MAX_ELEMENTOS_LOTE = 1 << 23
+# Janelas com mais de 26^3 combinações (4 posições) são podadas por posição antes do produto
+MAX_COMBINACOES = 26 ** 3
+LETRAS_POR_POSICAO = 8
+
 def melhor_deslocamento(fatia):
-    best_k = 0; best_s = -1e9
-    for k in range(26):
-        dec = [(ord(c)-ord('a')-k) % 26 for c in fatia]
-        s = sum(freq_portuguese[chr(v+ord('a'))] for v in dec)
-        if s > best_s:
-            best_s, best_k = s, k
-    return chr(best_k + ord('a'))
+    # Soma das frequências do texto decifrado para cada deslocamento k:
+    # sum_c cont[c] * freq[(c - k) % 26], todos os k de uma vez
+    cont = TextoCodificado.de(fatia).contagem_letras()
+    return chr(int(np.argmax(modelo.freq_letras[_DESLOC] @ cont)) + ord('a'))
+
+# Tabela L[a, b, x, y] = log2[(x - a) % 26, (y - b) % 26]: bigrama claro do par
+# cifrado (x, y) quando as letras da chave nas duas posições são a e b
+_DESLOC = (np.arange(26)[None, :] - np.arange(26)[:, None]) % 26
+TABELA_BIGRAMAS_CHAVE = modelo.log2[_DESLOC[:, None, :, None], _DESLOC[None, :, None, :]]
+
+def tabelas_transicao(texto_cifrado, K):
+    """T[j, a, b]: score de bigramas entre as posições j e j+1 (mod K) da chave.
+
+    Só dependem dos histogramas de pares cifrados (c_i, c_i+1) com i = j mod K.
+    """
+    cifra = TextoCodificado.de(texto_cifrado).codigos.astype(np.intp)
+    i = np.arange(len(cifra) - 1)
+    pares = np.bincount((i % K) * 676 + cifra[:-1] * 26 + cifra[1:], minlength=K * 676)
+    return np.einsum('jxy,abxy->jab', pares.reshape(K, 26, 26), TABELA_BIGRAMAS_CHAVE)
+
+def chave_viterbi(texto_cifrado, K):
+    """Chave que maximiza o score de bigramas, por programação dinâmica na cadeia de posições.
+
+    A cadeia é cíclica (a posição K-1 liga na 0): fixa-se a primeira letra e
+    roda-se o Viterbi para as 26 escolhas de uma vez. Custo O(K * 26^3).
+    """
+    T = tabelas_transicao(texto_cifrado, K)
+    if K == 1:
+        melhor = int(np.argmax(np.diagonal(T[0])))
+        return chr(melhor + ord('a')), float(T[0, melhor, melhor])
+
+    # score[a0, b]: melhor caminho que começa em a0 e está em b
+    score = T[0].copy()
+    volta = np.zeros((K, 26, 26), dtype=np.intp)
+    for j in range(1, K - 1):
+        candidatos = score[:, :, None] + T[j][None, :, :]
+        volta[j + 1] = candidatos.argmax(axis=1)
+        score = candidatos.max(axis=1)
+    score = score + T[K - 1].T  # fecha o ciclo: b (posição K-1) -> a0
+    a0, b = np.unravel_index(np.argmax(score), score.shape)
+
+    chave = [b]
+    for j in range(K - 1, 1, -1):
+        chave.append(volta[j, a0, chave[-1]])
+    chave.append(a0)
+    return ''.join(chr(int(v) + ord('a')) for v in reversed(chave)), float(score[a0, b])
 
 def hill_climb(init_key, texto, max_no_improve=500):
-    best_key = init_key
-    best_score = pontuacao_texto(decifrar_vigenere(texto, best_key))
-    no_imp = 0
+    avaliador = AvaliadorIncremental(texto, init_key)
+    no_imp = avaliados = 0
     while no_imp < max_no_improve:
-        i = random.randrange(len(best_key))
+        i = random.randrange(avaliador.K)
         letra = chr(random.randrange(26) + ord('a'))
-        if letra == best_key[i]: continue
-        cand = best_key[:i] + letra + best_key[i+1:]
-        s = pontuacao_texto(decifrar_vigenere(texto, cand))
-        if s > best_score:
-            best_key, best_score = cand, s
+        if ord(letra) - ord('a') == avaliador.k[i]: continue
+        avaliados += 1
+        if avaliador.avaliar(i, letra) > avaliador.score:
+            avaliador.aplicar(i, letra)
             no_imp = 0
         else:
             no_imp += 1
-    return best_key, best_score
+    telemetria.contar(avaliados)
+    telemetria.melhor(avaliador.score, lambda: avaliador.texto)
+    return avaliador.chave, avaliador.score
 
 def refinar_chave_proxima(chave_base, texto_cifrado, max_iter_sem_melhora=10000):
-    melhor_chave = chave_base
-    melhor_score = pontuacao_texto(decifrar_vigenere(texto_cifrado, melhor_chave))
-    sem_melhora = 0
+    avaliador = AvaliadorIncremental(texto_cifrado, chave_base)
+    sem_melhora = avaliados = 0
     while sem_melhora < max_iter_sem_melhora:
-        nova = list(melhor_chave)
-        i = random.randint(0, len(nova) - 1)
-        letra_antiga = nova[i]
-        nova[i] = chr((ord(letra_antiga) - ord('a') + random.randint(1, 25)) % 26 + ord('a'))
-        nova_chave = ''.join(nova)
-        score = pontuacao_texto(decifrar_vigenere(texto_cifrado, nova_chave))
-        if score > melhor_score:
-            melhor_chave = nova_chave
-            melhor_score = score
+        i = random.randint(0, avaliador.K - 1)
+        letra = chr((int(avaliador.k[i]) + random.randint(1, 25)) % 26 + ord('a'))
+        avaliados += 1
+        if avaliador.avaliar(i, letra) > avaliador.score:
+            avaliador.aplicar(i, letra)
             sem_melhora = 0
         else:
             sem_melhora += 1
-    return melhor_chave, melhor_score, decifrar_vigenere(texto_cifrado, melhor_chave)
+    telemetria.contar(avaliados)
+    telemetria.melhor(avaliador.score, lambda: avaliador.texto)
+    return avaliador.chave, avaliador.score, avaliador.texto
 
 def refinar_posicoes(chave_base, texto, posicoes):
-    from itertools import product
+    avaliador = AvaliadorIncremental(texto, chave_base)
 
-    melhor_chave = chave_base
-    melhor_score = pontuacao_texto(decifrar_vigenere(texto, chave_base))
-
-    for letras in product(range(26), repeat=len(posicoes)):
-        nova = list(chave_base)
+    # Combinações das posições pontuadas em lote (podadas acima de 3 posições)
+    letras, score = avaliador.melhor_combinacao(posicoes)
+    if score > avaliador.score:
         for p, l in zip(posicoes, letras):
-            nova[p] = chr(ord('a') + l)
-        nova_chave = ''.join(nova)
-        score = pontuacao_texto(decifrar_vigenere(texto, nova_chave))
-        if score > melhor_score:
-            melhor_chave = nova_chave
-            melhor_score = score
+            avaliador.aplicar(p, chr(ord('a') + l))
+
+    return avaliador.chave, avaliador.score, avaliador.texto
+
+def reinicio_aleatorio(texto_cifrado, K):
+    """Um reinício do hill climbing a partir de uma chave aleatória."""
+    init = ''.join(chr(random.randrange(26)+ord('a')) for _ in range(K))
+    return hill_climb(init, texto_cifrado)
 
-    return melhor_chave, melhor_score, decifrar_vigenere(texto, melhor_chave)
+def tamanhos_provaveis(texto_cifrado, candidatos=3):
+    """Melhores tamanhos de chave estimados, sem múltiplos de um tamanho mais bem colocado.
+
+    Só um tamanho mais bem colocado descarta os seus múltiplos: um divisor
+    do período certo não é um período, então não pode tomar o lugar dele.
+    """
+    tamanhos = []
+    for k, _ in estimar_tamanho_chave(texto_cifrado, top=3 * candidatos):
+        if not any(k % t == 0 for t in tamanhos):
+            tamanhos.append(k)
+    return tamanhos[:candidatos]
+
+# Tamanhos aceitos para a janela do refinamento: 26^tamanho combinações por janela (4 com poda)
+TAMANHOS_JANELA = range(2, 5)
+
+def decifrar_automatico(texto_cifrado, K=None, candidatos=3, reinicios=0, tamanho_janela=3, semente=0):
+    if tamanho_janela not in TAMANHOS_JANELA:
+        raise ValueError(f"tamanho_janela deve ser de 2 a 4, não {tamanho_janela}")
+    # Codificado uma vez só; as fases reaproveitam as mesmas contagens
+    texto_cifrado = TextoCodificado.de(texto_cifrado)
+    # Sem K: roda o ataque só nos tamanhos mais prováveis e fica com o melhor
+    if K is None:
+        with telemetria.fase('tamanho'):
+            tamanhos = tamanhos_provaveis(texto_cifrado, candidatos)
+        print(f"Tamanhos de chave prováveis: {tamanhos}")
+        resultados = [decifrar_automatico(texto_cifrado, k, reinicios=reinicios,
+                                          tamanho_janela=tamanho_janela, semente=semente)
+                      for k in tamanhos]
+        return max(resultados, key=lambda r: r[2])
 
-def decifrar_automatico(texto_cifrado, K=30):
     print("============================")
     print("Iniciando Descriptografia")
     print("============================")
     
     # 1) Chave inicial por frequência
-    chave_init = []
-    for i in range(K):
-        fat = [texto_cifrado[j] for j in range(i, len(texto_cifrado), K)]
-        chave_init.append(melhor_deslocamento(''.join(fat)))
-    chave_init = ''.join(chave_init)
-
-    # 2) Reinícios aleatórios + hill-climbing
-    RESTARTS = int(15*(K/10))
+    with telemetria.fase('frequencia'):
+        chave_init = ''.join(melhor_deslocamento(coluna) for coluna in texto_cifrado.colunas(K))
+
+    # 2) Chave ótima para os bigramas (Viterbi) e por frequência, seguidas de
+    # hill-climbing; reinícios aleatórios só se pedidos, em paralelo
+    with telemetria.fase('viterbi'):
+        chave_dp, _ = chave_viterbi(texto_cifrado, K)
     best_key, best_score = None, -np.inf
-    for r in range(RESTARTS):
-        print(f"Iteração {r} de {RESTARTS}")
-        if r == 0:
-            init = chave_init
-        else:
-            init = ''.join(chr(random.randrange(26)+ord('a')) for _ in range(K))
-        k_r, s_r = hill_climb(init, texto_cifrado)
+    with telemetria.fase('hill_climb'):
+        for init in (chave_dp, chave_init):
+            k_r, s_r = hill_climb(init, texto_cifrado)
+            if s_r > best_score:
+                best_key, best_score = k_r, s_r
+    if reinicios:
+        with telemetria.fase('reinicios'):
+            k_r, s_r, _ = executar_reinicios(reinicio_aleatorio, reinicios, args=(texto_cifrado, K), semente=semente)
         if s_r > best_score:
             best_key, best_score = k_r, s_r
 
@@ -181,33 +360,33 @@ def decifrar_automatico(texto_cifrado, K=30):
     print("============================")
 
     # Refinamento inicial
-    best_key, best_score, plaintext = refinar_chave_proxima(best_key, texto_cifrado)
-    
-    # Refinamento em grupos de 3 posições com slide
-    tamanho_chave = len(best_key)
-    # while True:
-    #     melhorou = False
-    for inicio in range(tamanho_chave - 2):
-        posicoes = [inicio, inicio + 1, inicio + 2]
-        print(f"\nRefinando posições {posicoes}")
-        
-        chave_temp, score_temp, texto_temp = refinar_posicoes(
-            best_key,
-            texto_cifrado,
-            posicoes=posicoes
-        )
-        
-        if score_temp > best_score:
-            best_key = chave_temp
-            best_score = score_temp
-            plaintext = texto_temp
-            melhorou = True
-            print(f"Melhoria encontrada! Nova pontuação: {best_score}")
-            print(f"Nova chave: {best_key}")
-            #break
-    
-        # if not melhorou:
-        #     break
+    with telemetria.fase('refinamento'):
+        best_key, best_score, plaintext = refinar_chave_proxima(best_key, texto_cifrado)
+
+        # Refinamento em grupos de tamanho_janela (TAMANHOS_JANELA) posições com slide
+        tamanho_chave = len(best_key)
+        # while True:
+        #     melhorou = False
+        for inicio in range(max(tamanho_chave - tamanho_janela + 1, 1)):
+            posicoes = list(range(inicio, min(inicio + tamanho_janela, tamanho_chave)))
+
+            chave_temp, score_temp, texto_temp = refinar_posicoes(
+                best_key,
+                texto_cifrado,
+                posicoes=posicoes
+            )
+
+            if score_temp > best_score:
+                best_key = chave_temp
+                best_score = score_temp
+                plaintext = texto_temp
+                melhorou = True
+                telemetria.evento('melhora_refinamento', posicoes=posicoes, score=best_score, chave=best_key)
+                telemetria.melhor(best_score, plaintext)
+                #break
+
+            # if not melhorou:
+            #     break
 
     print("============================")
     print("Resultados Refinados")
@@ -221,5 +400,6 @@ def decifrar_automatico(texto_cifrado, K=30):
 
 if __name__ == "__main__":
     texto_cifrado = "textocifrado"
-    tamanho_chave = 10
-    chave, texto_decifrado, pontuacao = decifrar_automatico(texto_cifrado, tamanho_chave) 
\ No newline at end of file
+    # None: o tamanho da chave é estimado a partir do próprio texto cifrado
+    tamanho_chave = None
+    chave, texto_decifrado, pontuacao = decifrar_automatico(texto_cifrado, tamanho_chave)
@@ -0,0 +1,190 @@
+"""Verificações mínimas de comportamento dos kernels dos ataques.
+
+Cada verificação monta um desafio pequeno com semente fixa (texto sorteado do
+vocabulário do modelo, como no benchmark.py) e confere o kernel contra a
+conta feita do jeito direto ou contra a chave usada para cifrar.
+
+Uso:
+    python verificacoes.py            # roda todas
+    python verificacoes.py vigenere   # só as que contêm este texto no nome
+"""
+import contextlib
+import io
+import sys
+import time
+import traceback
+
+import numpy as np
+
+from benchmark import RAIZ, carregar_script, texto_base
+
+sys.path.insert(0, f"{RAIZ}/textos_desconhecidos_solucao")
+from modelo_linguagem import carregar_modelo, codificar, decodificar
+
+modelo = carregar_modelo()
+_scripts = {}
+
+def script(caminho):
+    """carregar_script uma vez por caminho (várias verificações usam o mesmo)."""
+    if caminho not in _scripts:
+        _scripts[caminho] = carregar_script(caminho, 'verif_' + caminho.replace('/', '_')[:-3])
+    return _scripts[caminho]
+
+def verificar_deltas_jakobsen():
+    """AvaliadorTrocas.deltas: variação de cada troca igual à do score recalculado."""
+    mono = script('textos_desconhecidos_solucao/mono/main.py')
+    avaliador = mono.AvaliadorTrocas(texto_base(500, modelo, 1))
+    k = np.random.default_rng(0).permutation(26)
+    base = avaliador.pontuar(k)
+    esperado = []
+    for a, b in mono.PARES_TROCA:
+        trocada = k.copy()
+        trocada[a], trocada[b] = trocada[b], trocada[a]
+        esperado.append(avaliador.pontuar(trocada) - base)
+    assert np.allclose(avaliador.deltas(k), esperado)
+
+def cifrar_vigenere(texto, chave):
+    return decodificar((codificar(texto) + np.resize(codificar(chave), len(texto))) % 26)
+
+def verificar_score_incremental_vigenere():
+    """AvaliadorIncremental: score inicial e avaliar() iguais a pontuacao_texto do texto inteiro."""
+    vigenere = script('textos_desconhecidos_solucao/vigenere/vigenere_final.py')
+    cifra = cifrar_vigenere(texto_base(600, modelo, 2), 'limao')
+    chave = 'abcde'
+    avaliador = vigenere.AvaliadorIncremental(cifra, chave)
+    assert np.isclose(avaliador.score, vigenere.pontuacao_texto(vigenere.decifrar_vigenere(cifra, chave)))
+    for pos in range(len(chave)):
+        for letra in 'aqz':
+            nova = chave[:pos] + letra + chave[pos + 1:]
+            assert np.isclose(avaliador.avaliar(pos, letra), vigenere.pontuacao_texto(vigenere.decifrar_vigenere(cifra, nova)))
+
+def desafio_vigenere(tamanho, K, semente):
+    """(texto cifrado, chave) com chave aleatória de K letras."""
+    chave = decodificar(np.random.default_rng(semente).integers(0, 26, K).astype(np.uint8))
+    return cifrar_vigenere(texto_base(tamanho, modelo, semente)[:tamanho], chave), chave
+
+def verificar_estimativa_tamanho_chave():
+    """estimar_tamanho_chave põe o período certo em primeiro (1000 letras)."""
+    tamanho_chave = script('textos_desconhecidos_solucao/vigenere/tamanho_chave.py')
+    for K in (20, 30):
+        cifra, _ = desafio_vigenere(1000, K, K)
+        assert tamanho_chave.estimar_tamanho_chave(cifra, 1)[0][0] == K
+
+def verificar_tamanhos_provaveis():
+    """tamanhos_provaveis mantém o período certo mesmo com K/2 ou K/3 no ranking."""
+    vigenere = script('textos_desconhecidos_solucao/vigenere/vigenere_final.py')
+    for tamanho in (360, 1000):
+        for K in (20, 30, 40, 60):
+            cifra, _ = desafio_vigenere(tamanho, K, K + tamanho)
+            assert K in vigenere.tamanhos_provaveis(cifra), (tamanho, K)
+
+def verificar_tamanho_janela_invalido():
+    """decifrar_automatico recusa janelas de refinamento fora de 2 a 4."""
+    vigenere = script('textos_desconhecidos_solucao/vigenere/vigenere_final.py')
+    for tamanho_janela in (0, 1, 5):
+        try:
+            vigenere.decifrar_automatico('abc', 3, tamanho_janela=tamanho_janela)
+        except ValueError:
+            continue
+        raise AssertionError(f"tamanho_janela={tamanho_janela} aceito")
+
+def verificar_janela_podada():
+    """melhor_combinacao com 4 posições (podada por posição) corrige uma janela inteira errada."""
+    vigenere = script('textos_desconhecidos_solucao/vigenere/vigenere_final.py')
+    cifra, chave = desafio_vigenere(300, 10, 9)
+    errada = chave[:3] + 'aaaa' + chave[7:]
+    letras, score = vigenere.AvaliadorIncremental(cifra, errada).melhor_combinacao(range(3, 7))
+    assert decodificar(np.array(letras, dtype=np.uint8)) == chave[3:7]
+    assert np.isclose(score, vigenere.pontuacao_texto(vigenere.decifrar_vigenere(cifra, chave)))
+
+def verificar_chave_viterbi():
+    """chave_viterbi dá o máximo do score de bigramas, conferido por força bruta com K=3."""
+    vigenere = script('textos_desconhecidos_solucao/vigenere/vigenere_final.py')
+    cifra = cifrar_vigenere(texto_base(300, modelo, 6)[:300], 'sol')
+    chaves = np.stack(np.meshgrid(*[np.arange(26)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+    planos = (codificar(cifra)[None, :] - np.tile(chaves, (1, 100))) % 26
+    scores = modelo.log2[planos[:, :-1], planos[:, 1:]].sum(axis=1, dtype=np.float64)
+    chave, score = vigenere.chave_viterbi(cifra, 3)
+    indice = int(codificar(chave).astype(np.int64) @ [26 * 26, 26, 1])
+    assert np.isclose(score, scores.max()) and np.isclose(scores[indice], scores.max())
+
+def verificar_reinicios_sem_reinicio():
+    """executar_reinicios recusa n_reinicios < 1 em vez de quebrar no max() vazio."""
+    from reinicios import executar_reinicios
+    for n_reinicios in (0, -1):
+        try:
+            executar_reinicios(lambda: ('a', 0.0), n_reinicios, max_workers=1)
+        except ValueError:
+            continue
+        raise AssertionError(f"n_reinicios={n_reinicios} aceito")
+
+def cifrar_hill(texto, K):
+    blocos = codificar(texto).astype(np.int64).reshape(-1, len(K))
+    return decodificar((blocos @ K.T.astype(np.int64) % 26).astype(np.uint8).ravel())
+
+def sortear_chave_hill(n, semente, triangular=False):
+    """Chave de Hill n x n invertível, sorteada pelo próprio GeraEP1."""
+    gera = script('data/textos_desconhecidos/GeraEP1.py')
+    chaves, _ = gera.sortear_chaves_hill(1, n, triangular=triangular, rng=np.random.default_rng(semente))
+    return chaves[0].astype(np.int64)
+
+def verificar_ataque_hill_nxn():
+    """ataque_hill_nxn recupera uma chave cheia 3x3 com 120 letras."""
+    hillnxn = script('textos_desconhecidos_solucao/hill/hillnxn.py')
+    plano = texto_base(120, modelo, 3)[:120]
+    K = sortear_chave_hill(3, 3)
+    texto, _, _, _, chave = hillnxn.ataque_hill_nxn(cifrar_hill(plano, K), 3)[0]
+    assert texto == plano and (np.asarray(chave) == K).all()
+
+def verificar_resolver_hill_lote():
+    """Texto conhecido: as chaves 4x4 de um lote saem pelo escalonamento mod 2 e mod 13 + CRT."""
+    hill = script('textos_conhecidos_solucao/Hill/main.py')
+    plano = texto_base(120, modelo, 4)[:120]
+    K = [sortear_chave_hill(4, semente) for semente in (4, 5)]
+    planos = [codificar(plano).tolist()] * 2
+    chaves, resolvido = hill.resolver_hill_lote(planos, [codificar(cifrar_hill(plano, k)).tolist() for k in K], 4)
+    assert resolvido.all() and (chaves == np.stack(K)).all()
+    chave, inicio = hill.find_valid_hill_key(planos[0], codificar(cifrar_hill(plano, K[0])).tolist(), 4)
+    assert (chave == K[0]).all() and inicio == 0
+    chaves, resolvido = hill.resolver_hill_lote([], [], 4)
+    assert chaves.shape == (0, 4, 4) and resolvido.shape == (0,)
+
+def verificar_ataque_hill_3x3():
+    """ataque_hill_otimizado recupera uma chave triangular 3x3, inclusive com z não invertível."""
+    hill3x3 = script('textos_desconhecidos_solucao/hill/hill3x3.py')
+    plano = texto_base(120, modelo, 8)[:120]
+    K = np.array([[7, 5, 0], [0, 21, 22], [0, 0, 15]])
+    with contextlib.redirect_stdout(io.StringIO()):
+        texto, _, _, _, chave = hill3x3.ataque_hill_otimizado(cifrar_hill(plano, K))[0]
+    assert texto == plano and (np.asarray(chave) == K).all()
+
+def verificar_ataque_hill_triangular():
+    """ataque_hill_triangular recupera chaves triangulares 4x4 e 5x5 com 120 letras."""
+    hilltriangular = script('textos_desconhecidos_solucao/hill/hilltriangular.py')
+    plano = texto_base(120, modelo, 7)[:120]
+    for n in (4, 5):
+        K = sortear_chave_hill(n, n, triangular=True)
+        texto, _, _, _, chave = hilltriangular.ataque_hill_triangular(cifrar_hill(plano, K), n)[0]
+        assert texto == plano and (np.asarray(chave) == K).all(), n
+
+def executar(filtro=None):
+    """Roda as verificações (as que contêm ``filtro`` no nome); devolve as que falharam."""
+    falhas = []
+    for nome, funcao in globals().items():
+        if not nome.startswith('verificar_') or (filtro and filtro not in nome):
+            continue
+        inicio = time.perf_counter()
+        try:
+            funcao()
+            print(f"ok     {nome} ({time.perf_counter() - inicio:.2f}s)")
+        except Exception:
+            falhas.append(nome)
+            print(f"FALHOU {nome}")
+            traceback.print_exc()
+    return falhas
+
+if __name__ == "__main__":
+    falhas = executar(sys.argv[1] if len(sys.argv) > 1 else None)
+    if falhas:
+        print(f"{len(falhas)} verificações falharam")
+        sys.exit(1)